@@ -0,0 +1,168 @@
+"""
+Asyncio micro-batcher for /predict.
+
+Cache hits are answered directly. Other requests are queued and a single consumer
+groups them every few milliseconds (or as soon as max_batch_size is reached), runs
+one vectorized rollout for the whole group and resolves each caller's future.
+Requests with different k share the batch: the rollout runs for the largest k and
+every caller gets its own prefix.
+"""
+import asyncio
+import os
+import threading
+import time
+
+import inference
+
+
+class Histogram:
+    """Minimal cumulative histogram rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, buckets: list):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+            self.total += 1
+            self.sum += value
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+            for bound, count in zip(self.buckets, self.counts):
+                lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.total}')
+            lines.append(f"{self.name}_sum {self.sum}")
+            lines.append(f"{self.name}_count {self.total}")
+        return "\n".join(lines)
+
+
+class MicroBatcher:
+    def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        """
+        Args:
+            max_batch_size (int): Run the batch as soon as this many requests are queued.
+            max_wait_ms (float): Longest time the first request of a batch waits for company.
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._consumer = None
+
+        self.batch_size = Histogram(
+            "predict_batch_size", "Number of requests per forward pass",
+            [1, 2, 4, 8, 16, 32, 64, 128, 256],
+        )
+        self.queue_wait = Histogram(
+            "predict_queue_wait_seconds", "Time a request waited in the queue before its batch ran",
+            [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0],
+        )
+        self.batch_latency = Histogram(
+            "predict_batch_seconds", "Time spent running one batched rollout",
+            [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0],
+        )
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def stop(self) -> None:
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+            self._consumer = None
+
+    async def submit(self, arxiv_id: str, k: int) -> dict:
+        """Queue one prediction and wait for the batch that serves it."""
+        if not inference.is_ready():
+            raise inference.NotReadyError(f"Model is not ready yet (status: {inference.STARTUP_STATE['status']}).")
+        # Checked before queueing: in a shared batch a negative k would slice a prefix off the others' rollout
+        inference.check_horizon(k)
+        if arxiv_id not in inference.ROW_INDEX:
+            raise ValueError(f"Arxiv ID '{arxiv_id}' not found in the dataset.")
+
+        # Cache hits are answered right away instead of waiting for a batch
+        cached = inference.cached_prediction(arxiv_id, k)
+        if cached is not None:
+            return cached
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((arxiv_id, k, time.perf_counter(), future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+
+            started = time.perf_counter()
+            for _, _, queued_at, _ in batch:
+                self.queue_wait.observe(started - queued_at)
+            self.batch_size.observe(len(batch))
+
+            k_max = max(k for _, k, _, _ in batch)
+            ids = [aid for aid, _, _, _ in batch]
+            try:
+                # Run off the event loop; a single consumer keeps one forward pass in flight
+                predictions = await loop.run_in_executor(None, self._predict, ids, k_max)
+            except Exception as e:
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.batch_latency.observe(time.perf_counter() - started)
+
+            for aid, k, _, future in batch:
+                if not future.done():
+                    future.set_result(dict(list(predictions[aid].items())[:k]))
+
+    @staticmethod
+    def _predict(ids: list, k: int) -> dict:
+        # submit() already missed the cache for these ids, so only store the results
+        predictions = inference.predict_many(ids, k, use_cache=False)
+        for aid, preds in predictions.items():
+            inference.prediction_cache.put(aid, list(preds.values()))
+        return predictions
+
+    def render_metrics(self) -> str:
+        queue_depth = self._queue.qsize() if self._queue is not None else 0
+        return "\n".join([
+            self.batch_size.render(),
+            self.queue_wait.render(),
+            self.batch_latency.render(),
+            "# HELP predict_queue_depth Requests currently waiting for a batch",
+            "# TYPE predict_queue_depth gauge",
+            f"predict_queue_depth {queue_depth}",
+        ]) + "\n"
+
+
+batcher = MicroBatcher(
+    max_batch_size=int(os.environ.get('PREDICT_MAX_BATCH_SIZE', 64)),
+    max_wait_ms=float(os.environ.get('PREDICT_MAX_WAIT_MS', 5)),
+)
@@ -0,0 +1,166 @@
+"""
+Micro-benchmarks for the inference backend.
+
+Run from the backend directory, e.g.:
+    python benchmark.py rollout --n 200 --k 5
+    python benchmark.py explain --n 20
+    python benchmark.py startup
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def percentiles(latencies_ms) -> dict:
+    """p50/p95/p99 (and mean) of a list of latencies in milliseconds."""
+    arr = np.asarray(latencies_ms, dtype=np.float64)
+    if arr.size == 0:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": float(arr.mean()),
+    }
+
+
+def time_calls(fn, args_list, warmup: int = 3) -> list:
+    for args in args_list[:warmup]:
+        fn(*args)
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def bench_rollout(n: int = 200, k: int = 5) -> dict:
+    """
+    Compare per-request latency of the model.predict loop against the compiled rollout.
+    """
+    import inference
+    inference.load_resources(warmup=False)
+
+    ids = list(inference.ROW_INDEX)[:n]
+    args_list = [(aid,) for aid in ids]
+
+    results = {}
+    for name, compiled in [("predict_loop", False), ("compiled", True)]:
+        latencies = time_calls(
+            lambda aid: inference.predict_many([aid], k, compiled=compiled, use_cache=False), args_list
+        )
+        results[name] = percentiles(latencies)
+
+    # The two paths must agree
+    loop = inference.predict_many(ids[:20], k, compiled=False, use_cache=False)
+    fast = inference.predict_many(ids[:20], k, compiled=True, use_cache=False)
+    results["max_abs_diff"] = max(
+        abs(loop[aid][col] - fast[aid][col]) for aid in loop for col in loop[aid]
+    )
+    return results
+
+
+def _rank(x):
+    return np.argsort(np.argsort(x))
+
+
+def bench_explain(n: int = 20) -> dict:
+    """
+    Latency of the kernel vs gradient explainer backends, and fidelity of the
+    gradient attributions against the KernelExplainer result for the same papers.
+    """
+    import inference
+    inference.load_resources(warmup=False)
+
+    ids = list(inference.ROW_INDEX)[:n]
+
+    results = {}
+    values = {}
+    for backend in ["kernel", "gradient"]:
+        inference.compute_attributions(ids[:1], backend)  # warm up explainer / trace
+        latencies = time_calls(lambda aid: inference.compute_attributions([aid], backend), [(aid,) for aid in ids], warmup=0)
+        start = time.perf_counter()
+        values[backend] = inference.compute_attributions(ids, backend)
+        results[backend] = percentiles(latencies)
+        results[backend]["batch_ms"] = (time.perf_counter() - start) * 1000
+
+    kernel, gradient = values["kernel"], values["gradient"]
+    spearman, top10_overlap = [], []
+    for k_row, g_row in zip(kernel, gradient):
+        spearman.append(np.corrcoef(_rank(np.abs(k_row)), _rank(np.abs(g_row)))[0, 1])
+        k_top = {f["feature"] for f in inference.top_attributions(k_row)}
+        g_top = {f["feature"] for f in inference.top_attributions(g_row)}
+        top10_overlap.append(len(k_top & g_top) / max(len(k_top | g_top), 1))
+
+    # Integrated gradients should satisfy completeness: sum(attr) = f(x) - f(baseline)
+    combined = inference._combined_inputs(ids)
+    baseline = inference._background_inputs().mean(axis=0, keepdims=True)
+
+    def f(x):
+        return inference.model.predict(
+            {"ts_input": x[:, :inference.TIME_STEPS, np.newaxis], "static_input": x[:, inference.TIME_STEPS:]},
+            verbose=0,
+        ).reshape(-1)
+
+    completeness_gap = np.abs(gradient.sum(axis=1) - (f(combined) - f(baseline)))
+
+    results["fidelity"] = {
+        "mean_spearman_abs_rank": float(np.mean(spearman)),
+        "mean_top10_jaccard": float(np.mean(top10_overlap)),
+        "max_completeness_gap": float(completeness_gap.max()),
+    }
+    return results
+
+
+_STARTUP_PROBE = """
+import json, time
+start = time.perf_counter()
+import inference
+import_s = time.perf_counter() - start
+state = inference.load_resources(warmup={warmup})
+print(json.dumps({{"import_inference_s": round(import_s, 4), **state["timings"]}}))
+"""
+
+
+def bench_startup(repeats: int = 3, warmup: bool = True) -> dict:
+    """
+    Cold-start cost per phase, each run in a fresh interpreter. The module import
+    itself should stay cheap; the heavy phases show up under their own names.
+    """
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", _STARTUP_PROBE.format(warmup=warmup)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {phase: float(np.median([run[phase] for run in runs])) for phase in runs[0]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rollout_parser = subparsers.add_parser("rollout", help="p50/p99 latency: model.predict loop vs compiled rollout")
+    rollout_parser.add_argument("--n", type=int, default=200, help="Number of single-paper requests")
+    rollout_parser.add_argument("--k", type=int, default=5, help="Years to predict")
+
+    explain_parser = subparsers.add_parser("explain", help="Kernel vs gradient explainer latency and fidelity")
+    explain_parser.add_argument("--n", type=int, default=20, help="Number of papers to explain")
+
+    startup_parser = subparsers.add_parser("startup", help="Median per-phase cold-start time over fresh interpreters")
+    startup_parser.add_argument("--repeats", type=int, default=3)
+    startup_parser.add_argument("--no-warmup", action="store_true", help="Skip the warm-up rollout")
+
+    args = parser.parse_args()
+    if args.command == "rollout":
+        print(json.dumps(bench_rollout(args.n, args.k), indent=4))
+    elif args.command == "explain":
+        print(json.dumps(bench_explain(args.n), indent=4))
+    elif args.command == "startup":
+        print(json.dumps(bench_startup(args.repeats, not args.no_warmup), indent=4))
@@ -0,0 +1,103 @@
+"""
+Offline job that precomputes attributions for every paper in the dataset.
+
+Papers are split into chunks and explained across a process pool. The result is
+written to ATTRIBUTION_STORE_DIR as:
+    values.npy  - float32 matrix (num_papers, num_features), memory-mapped by the backend
+    index.json  - arxiv ids (row order), feature names, model version and explainer backend
+
+Run from the backend directory:
+    python build_attributions.py --workers 4
+    python build_attributions.py --backend gradient
+    python build_attributions.py --missing-only   # only fill papers not yet in the store
+"""
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+
+def _explain_chunk(arxiv_ids: list, backend: str):
+    # Each worker loads its own model / explainer on first use
+    import inference
+    inference.load_resources(warmup=False)
+    return arxiv_ids, inference.compute_attributions(arxiv_ids, backend)
+
+
+def write_store(store_dir: str, arxiv_ids: list, values: np.ndarray, feature_names: list,
+                model_version: str, backend: str = 'kernel') -> None:
+    """Atomically write the values matrix and its id index."""
+    os.makedirs(store_dir, exist_ok=True)
+    values_tmp = os.path.join(store_dir, 'values.tmp.npy')
+    index_tmp = os.path.join(store_dir, 'index.tmp.json')
+
+    np.save(values_tmp, np.ascontiguousarray(values, dtype=np.float32))
+    with open(index_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'arxiv_id': list(arxiv_ids),
+                   'feature_names': list(feature_names),
+                   'model_version': model_version,
+                   'backend': backend},
+                  f, ensure_ascii=False)
+
+    os.replace(values_tmp, os.path.join(store_dir, 'values.npy'))
+    os.replace(index_tmp, os.path.join(store_dir, 'index.json'))
+
+
+def build_store(store_dir: str, num_workers: int = 4, chunk_size: int = 64, missing_only: bool = False,
+                backend: str = 'kernel') -> None:
+    import inference
+    inference.load_resources(warmup=False)
+
+    all_ids = list(inference.ROW_INDEX)
+    done_ids, done_values = [], np.empty((0, len(inference.ALL_FEATURE_NAMES)), dtype=np.float32)
+
+    if missing_only:
+        store = inference.load_attribution_store(store_dir)
+        if store is not None and store[2] == backend:
+            values, row_of, _ = store
+            done_ids = list(row_of)
+            done_values = np.asarray(values, dtype=np.float32)
+
+    done = set(done_ids)
+    todo = [aid for aid in all_ids if aid not in done]
+    print(f"{len(done_ids)} papers already in store, computing {len(todo)}")
+    if not todo:
+        return
+
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    results = {}
+
+    # spawn: forking a process that already initialised TensorFlow is unsafe
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx) as pool:
+        futures = [pool.submit(_explain_chunk, chunk, backend) for chunk in chunks]
+        for n, future in enumerate(as_completed(futures), 1):
+            chunk_ids, chunk_values = future.result()
+            results.update(zip(chunk_ids, chunk_values))
+            print(f"\t{n}/{len(chunks)} chunks done")
+
+    new_values = np.stack([results[aid] for aid in todo]).astype(np.float32)
+    write_store(store_dir,
+                done_ids + todo,
+                np.concatenate([done_values, new_values], axis=0),
+                inference.ALL_FEATURE_NAMES,
+                inference.MODEL_VERSION,
+                backend)
+    print(f"Wrote {len(done_ids) + len(todo)} attributions to {store_dir}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--store-dir', default=None, help='Output directory (default: ATTRIBUTION_STORE_DIR)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--missing-only', action='store_true', help='Keep the existing store and only add missing papers')
+    parser.add_argument('--backend', default='kernel', choices=['kernel', 'gradient'], help='Explainer backend')
+    args = parser.parse_args()
+
+    import inference
+    build_store(args.store_dir or inference.ATTRIBUTION_STORE_DIR, args.workers, args.chunk_size, args.missing_only,
+                args.backend)
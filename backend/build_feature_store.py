@@ -0,0 +1,187 @@
+"""
+Convert the train/test feature CSVs into a columnar binary store the backend can memory-map.
+
+Output (FEATURE_STORE_DIR):
+    values.npy          - float32 matrix (num_rows, num_columns), rows in train + test order
+    index.json          - column names and the arxiv_id of every row
+    rows_citations.npy  - float32 (num_ids, TIME_STEPS): model citation window, one row per arxiv_id
+    rows_static.npy     - float32 (num_ids, num_static): static features, already scaled
+    rows.json           - arxiv_id of every serving row, the columns used and the scaler fingerprint
+
+Uvicorn workers memory-map these files read-only, so they share one copy of the pages
+through the OS page cache and skip CSV parsing at startup. Requests are served from
+the rows_* matrices directly; they are written again whenever the scaler changes.
+
+Run from the backend directory:
+    python build_feature_store.py
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+TRAIN_FEATURES_PATH = 'features/train_bertopic_full (1).csv'
+TEST_FEATURES_PATH = 'features/test_bertopic_full (1).csv'
+FEATURE_STORE_DIR = os.environ.get('FEATURE_STORE_DIR', 'features/store')
+SCALER_PATH = 'models/scaler_static_final.pkl'
+TIME_STEPS = 12
+START_YEAR_INPUT = 2013
+
+
+def file_fingerprint(*paths) -> str:
+    """
+    Short content hash of the given files, used as the model version.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def feature_columns(columns: list):
+    """
+    Static features and the TIME_STEPS citation columns the model reads.
+
+    Returns:
+        (static_features, start_year, citation_columns): the window starts in
+        START_YEAR_INPUT, or a year earlier when those columns are missing.
+    """
+    static_features = [col for col in columns if not col.startswith('citations_')]
+    start_year = START_YEAR_INPUT
+    citation_columns = [f'citations_{y}' for y in range(start_year, start_year + TIME_STEPS)]
+
+    missing_cols = [c for c in citation_columns if c not in columns]
+    if missing_cols:
+        print(f"Warning: Missing columns {missing_cols}. Falling back to 2012-2023 range.")
+        start_year = 2012
+        citation_columns = [f'citations_{y}' for y in range(start_year, start_year + TIME_STEPS)]
+    return static_features, start_year, citation_columns
+
+
+def serving_rows(df: pd.DataFrame, arxiv_ids: list, scaler, static_features: list, citation_columns: list):
+    """
+    One row per arxiv_id (the first one: train wins over test), as the model consumes it.
+
+    Returns:
+        (row_ids, citations, static_scaled): float32 C-contiguous matrices.
+    """
+    first_rows = ~pd.Index(arxiv_ids).duplicated(keep='first')
+    row_ids = [aid for aid, first in zip(arxiv_ids, first_rows) if first]
+    static_scaled = np.ascontiguousarray(
+        scaler.transform(df.loc[first_rows, static_features].values), dtype=np.float32
+    )
+    citations = np.ascontiguousarray(df.loc[first_rows, citation_columns].values, dtype=np.float32)
+    return row_ids, citations, static_scaled
+
+
+def write_serving_rows(df: pd.DataFrame, arxiv_ids: list, scaler_path: str = SCALER_PATH,
+                       store_dir: str = FEATURE_STORE_DIR) -> None:
+    static_features, _, citation_columns = feature_columns(df.columns.tolist())
+    scaler = joblib.load(scaler_path)
+    row_ids, citations, static_scaled = serving_rows(df, arxiv_ids, scaler, static_features, citation_columns)
+
+    for name, values in [('rows_citations', citations), ('rows_static', static_scaled)]:
+        np.save(os.path.join(store_dir, f'{name}.tmp.npy'), values)
+    rows_tmp = os.path.join(store_dir, 'rows.tmp.json')
+    with open(rows_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'arxiv_id': row_ids,
+                   'static_features': static_features,
+                   'citation_columns': citation_columns,
+                   'scaler_fingerprint': file_fingerprint(scaler_path)},
+                  f, ensure_ascii=False)
+
+    for name in ['rows_citations', 'rows_static']:
+        os.replace(os.path.join(store_dir, f'{name}.tmp.npy'), os.path.join(store_dir, f'{name}.npy'))
+    os.replace(rows_tmp, os.path.join(store_dir, 'rows.json'))
+    print(f"Wrote {len(row_ids)} pre-scaled serving rows to {store_dir}")
+
+
+def build_feature_store(csv_paths: list, store_dir: str = FEATURE_STORE_DIR, scaler_path: str = SCALER_PATH) -> None:
+    df = pd.concat([pd.read_csv(path, dtype={'arxiv_id': str}) for path in csv_paths])
+    arxiv_ids = df.pop('arxiv_id').tolist()
+
+    non_numeric = [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])]
+    if non_numeric:
+        raise ValueError(f"Non-numeric feature columns {non_numeric} cannot go into the float32 store.")
+
+    os.makedirs(store_dir, exist_ok=True)
+    values_tmp = os.path.join(store_dir, 'values.tmp.npy')
+    index_tmp = os.path.join(store_dir, 'index.tmp.json')
+
+    values = np.ascontiguousarray(df.values, dtype=np.float32)
+    np.save(values_tmp, values)
+    with open(index_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'columns': df.columns.tolist(),
+                   'arxiv_id': arxiv_ids,
+                   'sources': [os.path.basename(path) for path in csv_paths]},
+                  f, ensure_ascii=False)
+
+    os.replace(values_tmp, os.path.join(store_dir, 'values.npy'))
+    os.replace(index_tmp, os.path.join(store_dir, 'index.json'))
+    print(f"Wrote {len(arxiv_ids)} rows x {df.shape[1]} columns to {store_dir}")
+
+    if os.path.exists(scaler_path):
+        # Scale the stored float32 values, exactly what a worker scaling load_feature_store() would get
+        write_serving_rows(pd.DataFrame(values, columns=df.columns), arxiv_ids, scaler_path, store_dir)
+    else:
+        print(f"Warning: no scaler at {scaler_path}; the backend will scale the rows at startup.")
+
+
+def load_feature_store(store_dir: str = FEATURE_STORE_DIR):
+    """
+    Open the store as a DataFrame backed by a read-only memmap (no copy), or None if missing.
+    """
+    index_path = os.path.join(store_dir, 'index.json')
+    values_path = os.path.join(store_dir, 'values.npy')
+    if not (os.path.exists(index_path) and os.path.exists(values_path)):
+        return None
+
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    values = np.load(values_path, mmap_mode='r')
+
+    df = pd.DataFrame(values, columns=index['columns'], copy=False)
+    df.index = pd.Index(index['arxiv_id'], name='arxiv_id')
+    return df
+
+
+def load_serving_rows(scaler_fingerprint: str, static_features: list, citation_columns: list,
+                      store_dir: str = FEATURE_STORE_DIR):
+    """
+    Open the pre-scaled serving rows as read-only memmaps.
+
+    Returns:
+        (row_index, citations, static_scaled), or None if the rows are missing or were
+        built for another scaler or other columns.
+    """
+    rows_path = os.path.join(store_dir, 'rows.json')
+    paths = [os.path.join(store_dir, f'{name}.npy') for name in ['rows_citations', 'rows_static']]
+    if not all(os.path.exists(path) for path in [rows_path, *paths]):
+        return None
+
+    with open(rows_path, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    if (rows['scaler_fingerprint'] != scaler_fingerprint or rows['static_features'] != static_features
+            or rows['citation_columns'] != citation_columns):
+        return None
+
+    citations, static_scaled = [np.load(path, mmap_mode='r') for path in paths]
+    row_index = {aid: i for i, aid in enumerate(rows['arxiv_id'])}
+    return row_index, citations, static_scaled
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', nargs='+', default=[TRAIN_FEATURES_PATH, TEST_FEATURES_PATH],
+                        help='Feature CSVs to convert, concatenated in order')
+    parser.add_argument('--store-dir', default=FEATURE_STORE_DIR)
+    parser.add_argument('--scaler', default=SCALER_PATH, help='Scaler the serving rows are pre-scaled with')
+    args = parser.parse_args()
+
+    build_feature_store(args.csv, args.store_dir, args.scaler)
@@ -1,121 +1,584 @@
-from tensorflow.keras.models import load_model
+import os
+import time
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import joblib
 import pandas as pd
 import numpy as np
-import shap
+from build_feature_store import (TRAIN_FEATURES_PATH, TEST_FEATURES_PATH, FEATURE_STORE_DIR, SCALER_PATH,
+                                 TIME_STEPS, feature_columns, file_fingerprint, load_feature_store,
+                                 load_serving_rows, serving_rows)
 
-scaler_static = joblib.load('models/scaler_static_final.pkl')
+# Heavy resources (TensorFlow, the model, the features) are loaded by load_resources(),
+# which main.py runs in a background thread so the app can bind its port right away.
+# Until it has finished, the public functions raise NotReadyError.
 MODEL_PATH = 'models/hybrid_lstm_final_model.keras'
-model = load_model(MODEL_PATH)
+WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', '1') == '1'
 
-df_train = pd.read_csv('features/train_bertopic_full (1).csv', dtype={'arxiv_id': str})
-df_test = pd.read_csv('features/test_bertopic_full (1).csv', dtype={'arxiv_id': str})
-df = pd.concat([df_train, df_test])
-
-if 'arxiv_id' in df.columns:
-    df.set_index('arxiv_id', inplace=True)
-
-STATIC_FEATURES = [col for col in df.columns if not col.startswith('citations_')]
-TIME_STEPS = 12
+scaler_static = None
+model = None
+df = None
+STATIC_FEATURES = []
 START_YEAR_INPUT = 2013
 INPUT_CITATION_COLS = [f'citations_{y}' for y in range(START_YEAR_INPUT, START_YEAR_INPUT + TIME_STEPS)]
+MODEL_VERSION = None
 
-missing_cols = [c for c in INPUT_CITATION_COLS if c not in df.columns]
-if missing_cols:
-    print(f"Warning: Missing columns {missing_cols}. Falling back to 2012-2023 range.")
-    START_YEAR_INPUT = 2012
-    INPUT_CITATION_COLS = [f'citations_{y}' for y in range(START_YEAR_INPUT, START_YEAR_INPUT + TIME_STEPS)]
+# Row index: dense float32 arrays, so a request is a dict lookup plus two array views
+# instead of df.loc + label slicing + scaler.transform. Normally they are the pre-scaled
+# memmaps of the feature store, shared by every worker; otherwise built at load time.
+ROW_INDEX = {}
+X_STATIC_SCALED = None
+X_CITATIONS = None
 
 
-def predict_next_k_years(arxiv_id: str, k: int = 4) -> dict:
+class NotReadyError(RuntimeError):
+    """Raised when a request arrives before load_resources() has finished."""
+
+
+class InvalidHorizonError(ValueError):
+    """Raised for a negative number of years to predict."""
+
+
+def check_horizon(k: int) -> None:
+    if k < 0:
+        raise InvalidHorizonError(f"k must be a non-negative number of years, got {k}.")
+
+
+STARTUP_STATE = {'status': 'not_started', 'error': None, 'timings': {}}
+_ready = threading.Event()
+_load_lock = threading.Lock()
+
+
+@contextmanager
+def _timed(phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_STATE['timings'][phase] = round(time.perf_counter() - start, 4)
+
+
+def _load_features():
+    # Prefer the memory-mapped feature store (build_feature_store.py), shared across workers
+    features = load_feature_store()
+    if features is None:
+        print(f"Warning: no feature store in {FEATURE_STORE_DIR}, reading CSVs. Run build_feature_store.py for faster startup.")
+        df_train = pd.read_csv(TRAIN_FEATURES_PATH, dtype={'arxiv_id': str})
+        df_test = pd.read_csv(TEST_FEATURES_PATH, dtype={'arxiv_id': str})
+        features = pd.concat([df_train, df_test])
+
+        if 'arxiv_id' in features.columns:
+            features.set_index('arxiv_id', inplace=True)
+    return features
+
+
+def _set_feature_columns() -> None:
+    global STATIC_FEATURES, START_YEAR_INPUT, INPUT_CITATION_COLS, ALL_FEATURE_NAMES
+    STATIC_FEATURES, START_YEAR_INPUT, INPUT_CITATION_COLS = feature_columns(df.columns.tolist())
+    ALL_FEATURE_NAMES = INPUT_CITATION_COLS + STATIC_FEATURES
+
+
+def _build_row_index(scaler_fingerprint: str = None) -> None:
+    global ROW_INDEX, X_STATIC_SCALED, X_CITATIONS
+    if scaler_fingerprint is not None:
+        rows = load_serving_rows(scaler_fingerprint, STATIC_FEATURES, INPUT_CITATION_COLS)
+        if rows is not None:
+            ROW_INDEX, X_CITATIONS, X_STATIC_SCALED = rows
+            return
+        print(f"Warning: no pre-scaled rows for this scaler in {FEATURE_STORE_DIR}, scaling in this process. "
+              f"Run build_feature_store.py to share one copy across workers.")
+    # The train/test concat can contain an id twice: the first row (train) wins.
+    row_ids, X_CITATIONS, X_STATIC_SCALED = serving_rows(df, df.index.tolist(), scaler_static,
+                                                         STATIC_FEATURES, INPUT_CITATION_COLS)
+    ROW_INDEX = {aid: i for i, aid in enumerate(row_ids)}
+
+
+def load_resources(warmup: bool = None, model_override=None, scaler_override=None, features_override=None) -> dict:
     """
-    Predict citations for the next k years for a specific paper.
-    
+    Load TensorFlow, the scaler, the model and the features, then build the row index.
+    Only the first call does the work; later calls return immediately.
+
     Args:
-        arxiv_id (str): The ID of the paper.
-        k (int): Number of years to predict.
-    
+        warmup (bool): Run a dummy batch through the rollout so the first request does
+            not pay for tracing. Defaults to WARMUP_ON_STARTUP.
+        model_override, scaler_override, features_override: In-memory objects used
+            instead of the files on disk (e.g. the synthetic set in loadtest.py).
+
     Returns:
-        dict: Format {year: predicted_citation_count}
+        dict: The startup state, including per-phase timings in seconds.
     """
-    if arxiv_id not in df.index:
-        raise ValueError(f"Arxiv ID '{arxiv_id}' not found in the dataset.")
+    global scaler_static, model, df, MODEL_VERSION
+    if warmup is None:
+        warmup = WARMUP_ON_STARTUP
+
+    with _load_lock:
+        if _ready.is_set():
+            return startup_state()
 
-    row = df.loc[[arxiv_id]]
+        STARTUP_STATE['status'] = 'loading'
+        start = time.perf_counter()
+        try:
+            with _timed('import_tensorflow'):
+                from tensorflow.keras.models import load_model
+            with _timed('load_scaler'):
+                scaler_static = scaler_override if scaler_override is not None else joblib.load(SCALER_PATH)
+            with _timed('load_model'):
+                model = model_override if model_override is not None else load_model(MODEL_PATH)
+            with _timed('load_features'):
+                df = features_override if features_override is not None else _load_features()
+                _set_feature_columns()
+            with _timed('build_row_index'):
+                from_disk = features_override is None and scaler_override is None
+                _build_row_index(file_fingerprint(SCALER_PATH) if from_disk else None)
+            with _timed('fingerprint'):
+                if model_override is None and scaler_override is None:
+                    MODEL_VERSION = file_fingerprint(MODEL_PATH, SCALER_PATH)
+                else:
+                    MODEL_VERSION = 'in-memory'
+                prediction_cache.clear()
+                prediction_cache.version = MODEL_VERSION
+            if warmup:
+                with _timed('warmup'):
+                    _rollout(np.zeros((1, TIME_STEPS, 1), np.float32),
+                             np.zeros((1, len(STATIC_FEATURES)), np.float32), 5)
+        except Exception as e:
+            STARTUP_STATE['status'] = 'failed'
+            STARTUP_STATE['error'] = str(e)
+            raise
 
-    X_static_raw = row[STATIC_FEATURES].values
-    X_static_scaled = scaler_static.transform(X_static_raw)
+        STARTUP_STATE['timings']['total'] = round(time.perf_counter() - start, 4)
+        STARTUP_STATE['status'] = 'ready'
+        _ready.set()
 
-    current_ts = row[INPUT_CITATION_COLS].values
-    current_ts = current_ts[:, :, np.newaxis]
+    print("Startup profile (s): " + ", ".join(f"{k}={v}" for k, v in STARTUP_STATE['timings'].items()))
+    return startup_state()
 
-    predictions = {}
-    start_prediction_year = START_YEAR_INPUT + TIME_STEPS  # e.g., 2013 + 12 = 2025
 
-    for i in range(k):
-        predicting_year = start_prediction_year + i
-        
-        X_ts_input = current_ts[:, -TIME_STEPS:, :]
+def startup_state() -> dict:
+    return {**STARTUP_STATE, 'timings': dict(STARTUP_STATE['timings'])}
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def _require_ready() -> None:
+    if not _ready.is_set():
+        raise NotReadyError(f"Model is not ready yet (status: {STARTUP_STATE['status']}).")
+
+
+def _feature_rows(arxiv_ids: list):
+    """
+    Citation windows (N, TIME_STEPS, 1) and scaled static features (N, num_static)
+    for known ids. A single id is served as views, several as one gather.
+    """
+    rows = [ROW_INDEX[aid] for aid in arxiv_ids]
+    if len(rows) == 1:
+        r = rows[0]
+        return X_CITATIONS[r:r + 1, :, np.newaxis], X_STATIC_SCALED[r:r + 1]
+    return X_CITATIONS[rows][:, :, np.newaxis], X_STATIC_SCALED[rows]
+
+
+# --- Compiled rollout ---
+# The whole k-step rollout is traced once per k into a single graph call, which
+# skips the data adapter / callbacks that model.predict builds on every call.
+# k comes from the request, so at most MAX_ROLLOUT_K graphs are traced: longer
+# rollouts chain MAX_ROLLOUT_K-step graph calls.
+# Set USE_COMPILED_ROLLOUT=0 to fall back to the model.predict loop.
+USE_COMPILED_ROLLOUT = os.environ.get('USE_COMPILED_ROLLOUT', '1') == '1'
+MAX_ROLLOUT_K = int(os.environ.get('MAX_ROLLOUT_K', 10))
+_compiled_rollouts = {}
+
+
+def _build_compiled_rollout(k: int):
+    import tensorflow as tf
+
+    @tf.function(
+        input_signature=[
+            tf.TensorSpec([None, TIME_STEPS, 1], tf.float32),
+            tf.TensorSpec([None, len(STATIC_FEATURES)], tf.float32),
+        ]
+    )
+    def rollout(window, static):
+        preds = []
+        for _ in range(k):  # k is fixed per trace, so the loop is unrolled in the graph
+            y_pred = model({'ts_input': window, 'static_input': static}, training=False)
+            y_pred = tf.maximum(tf.reshape(y_pred, [-1]), 0.0)
+            preds.append(y_pred)
+            window = tf.concat([window[:, 1:, :], y_pred[:, tf.newaxis, tf.newaxis]], axis=1)
+        return tf.stack(preds, axis=1)
 
-        # Predict
+    return rollout
+
+
+def _get_compiled_rollout(k: int):
+    """
+    Return the traced rollout for k (at most MAX_ROLLOUT_K steps), or None if the
+    model cannot be traced.
+    """
+    global USE_COMPILED_ROLLOUT
+    k = min(k, MAX_ROLLOUT_K)
+    if k not in _compiled_rollouts:
+        try:
+            rollout = _build_compiled_rollout(k)
+            # Trace eagerly with a dummy row so unsupported models fail here, not per request
+            rollout(
+                np.zeros((1, TIME_STEPS, 1), np.float32),
+                np.zeros((1, len(STATIC_FEATURES)), np.float32),
+            )
+        except Exception as e:
+            print(f"Warning: compiled rollout unavailable ({e}). Falling back to model.predict.")
+            USE_COMPILED_ROLLOUT = False
+            return None
+        _compiled_rollouts[k] = rollout
+    return _compiled_rollouts[k]
+
+
+def _rollout(X_ts, X_static_scaled, k: int, compiled: bool = None) -> np.ndarray:
+    """
+    Autoregressive rollout for a batch of papers.
+
+    Args:
+        X_ts (np.ndarray): Citation windows, shape (N, TIME_STEPS, 1).
+        X_static_scaled (np.ndarray): Scaled static features, shape (N, num_static).
+        k (int): Number of years to predict.
+        compiled (bool): Use the traced graph rollout. Defaults to USE_COMPILED_ROLLOUT.
+
+    Returns:
+        np.ndarray: Predictions of shape (N, k), clipped at 0.
+    """
+    n = X_ts.shape[0]
+    X_static_scaled = np.asarray(X_static_scaled, dtype=np.float32)
+
+    if compiled is None:
+        compiled = USE_COMPILED_ROLLOUT
+    if compiled and k > 0:
+        steps = [MAX_ROLLOUT_K] * (k // MAX_ROLLOUT_K) + ([k % MAX_ROLLOUT_K] if k % MAX_ROLLOUT_K else [])
+        graphs = {step: _get_compiled_rollout(step) for step in set(steps)}
+        if None not in graphs.values():
+            window = np.asarray(X_ts[:, -TIME_STEPS:, :], dtype=np.float32)
+            chunks = []
+            for step in steps:
+                chunk = graphs[step](window, X_static_scaled).numpy()
+                chunks.append(chunk)
+                # Continue from the last TIME_STEPS years, predictions included
+                window = np.concatenate([window, chunk[:, :, np.newaxis]], axis=1)[:, -TIME_STEPS:, :]
+            return np.concatenate(chunks, axis=1)
+
+    window = np.array(X_ts[:, -TIME_STEPS:, :], dtype=np.float32)
+    preds = np.empty((n, k), dtype=np.float32)
+
+    for i in range(k):
         y_pred = model.predict(
             {
-                'ts_input': X_ts_input,
+                'ts_input': window,
                 'static_input': X_static_scaled
             },
             verbose=0  # Silent
-        ).flatten()[0]
+        ).reshape(n)
+        y_pred = np.maximum(y_pred, 0)
+        preds[:, i] = y_pred
 
-        y_pred = max(0, y_pred)
-        
-        predictions[f'citations_{predicting_year}'] = float(y_pred)
+        # Slide the window by one year instead of growing the series
+        window[:, :-1, :] = window[:, 1:, :]
+        window[:, -1, 0] = y_pred
 
-        new_point = np.array([[[y_pred]]])
-        current_ts = np.concatenate([current_ts, new_point], axis=1)
+    return preds
 
-    return predictions
 
-# --- SHAP ---
-explainer = None
-ALL_FEATURE_NAMES = INPUT_CITATION_COLS + STATIC_FEATURES
+# --- Prediction cache ---
+class PredictionCache:
+    """
+    Bounded, thread-safe LRU cache of rollouts.
 
-def get_attribution(arxiv_id: str):
+    Conceptually keyed by (arxiv_id, k, model version). Only the longest rollout
+    per (arxiv_id, model version) is stored, since a rollout for k also answers
+    every shorter k: a cached k=5 result serves k=3 as its first 3 years.
     """
-    Calculate SHAP values for a specific paper.
+
+    def __init__(self, maxsize: int = 4096, version: str = ''):
+        self.maxsize = maxsize
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, arxiv_id: str, k: int):
+        """Return the first k predictions for arxiv_id, or None on a miss."""
+        key = (arxiv_id, self.version)
+        with self._lock:
+            preds = self._data.get(key)
+            if preds is None or len(preds) < k:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return preds[:k]
+
+    def put(self, arxiv_id: str, preds) -> None:
+        """Store a rollout, unless a longer one is already cached."""
+        if self.maxsize <= 0:
+            return
+        key = (arxiv_id, self.version)
+        preds = tuple(float(v) for v in preds)
+        with self._lock:
+            cached = self._data.get(key)
+            if cached is None or len(cached) < len(preds):
+                self._data[key] = preds
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'version': self.version,
+            }
+
+
+# The version is set to the model/scaler fingerprint by load_resources()
+prediction_cache = PredictionCache(maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)))
+
+
+def predict_many(arxiv_ids: list, k: int = 4, compiled: bool = None, use_cache: bool = True) -> dict:
     """
-    global explainer
-    if arxiv_id not in df.index:
-        raise ValueError(f"Arxiv ID '{arxiv_id}' not found")
+    Predict citations for the next k years for many papers at once.
+    The whole batch goes through the model together (k forward passes in total).
 
-    row = df.loc[[arxiv_id]]
-    X_static_scaled = scaler_static.transform(row[STATIC_FEATURES].values)
-    X_ts = row[INPUT_CITATION_COLS].values
-    combined_input = np.concatenate([X_ts, X_static_scaled], axis=1)
+    Args:
+        arxiv_ids (list): The IDs of the papers.
+        k (int): Number of years to predict.
+        compiled (bool): Use the traced graph rollout. Defaults to USE_COMPILED_ROLLOUT.
+        use_cache (bool): Serve and store rollouts through prediction_cache.
 
-    if explainer is None:
+    Returns:
+        dict: Format {arxiv_id: {year: predicted_citation_count}}
+    """
+    _require_ready()
+    check_horizon(k)
+    unique_ids = list(dict.fromkeys(arxiv_ids))
+    missing = [aid for aid in unique_ids if aid not in ROW_INDEX]
+    if missing:
+        raise ValueError(f"Arxiv IDs {missing} not found in the dataset.")
+
+    preds = {}
+    if use_cache:
+        for aid in unique_ids:
+            cached = prediction_cache.get(aid, k)
+            if cached is not None:
+                preds[aid] = cached
+    to_compute = [aid for aid in unique_ids if aid not in preds]
+
+    if to_compute:
+        X_ts, X_static_scaled = _feature_rows(to_compute)
+        computed = _rollout(X_ts, X_static_scaled, k, compiled=compiled)
+        for j, aid in enumerate(to_compute):
+            preds[aid] = computed[j]
+            if use_cache:
+                prediction_cache.put(aid, computed[j])
+
+    return {aid: _format_predictions(preds[aid], k) for aid in unique_ids}
+
+
+def _format_predictions(preds, k: int) -> dict:
+    start_prediction_year = START_YEAR_INPUT + TIME_STEPS  # e.g., 2013 + 12 = 2025
+    return {f'citations_{start_prediction_year + i}': float(preds[i]) for i in range(k)}
+
+
+def cached_prediction(arxiv_id: str, k: int):
+    """
+    Cache-only lookup, without running the model.
+
+    Returns:
+        dict: Format {year: predicted_citation_count}, or None on a cache miss.
+    """
+    preds = prediction_cache.get(arxiv_id, k)
+    return None if preds is None else _format_predictions(preds, k)
+
+
+def predict_next_k_years(arxiv_id: str, k: int = 4) -> dict:
+    """
+    Predict citations for the next k years for a specific paper.
+    
+    Args:
+        arxiv_id (str): The ID of the paper.
+        k (int): Number of years to predict.
+    
+    Returns:
+        dict: Format {year: predicted_citation_count}
+    """
+    _require_ready()
+    check_horizon(k)
+    if arxiv_id not in ROW_INDEX:
+        raise ValueError(f"Arxiv ID '{arxiv_id}' not found in the dataset.")
+
+    return predict_many([arxiv_id], k)[arxiv_id]
+
+# --- SHAP ---
+explainer = None
+ALL_FEATURE_NAMES = INPUT_CITATION_COLS + STATIC_FEATURES  # set again by load_resources()
+SHAP_NSAMPLES = 50
+
+
+def _combined_inputs(arxiv_ids: list) -> np.ndarray:
+    """Flat [citation window | scaled static] rows, as seen by the explainer."""
+    X_ts, X_static_scaled = _feature_rows(arxiv_ids)
+    return np.concatenate([X_ts[:, :, 0], X_static_scaled], axis=1)
+
+
+_background = None
+
+
+def _background_inputs() -> np.ndarray:
+    global _background
+    if _background is None:
         # Background: take a small representative sample
         bg_size = 10 
         bg_sample = df.sample(min(bg_size, len(df)), random_state=42)
         bg_static = scaler_static.transform(bg_sample[STATIC_FEATURES].values)
         bg_ts = bg_sample[INPUT_CITATION_COLS].values
-        bg_combined = np.concatenate([bg_ts, bg_static], axis=1)
+        _background = np.concatenate([bg_ts, bg_static], axis=1)
+    return _background
+
+
+def _get_explainer():
+    global explainer
+    if explainer is None:
+        import shap
 
         def model_predict_flat(x):
-            ts = x[:, :12].reshape(-1, 12, 1)
-            static = x[:, 12:]
+            ts = x[:, :TIME_STEPS].reshape(-1, TIME_STEPS, 1)
+            static = x[:, TIME_STEPS:]
             return model.predict({'ts_input': ts, 'static_input': static}, verbose=0).flatten()
 
-        explainer = shap.KernelExplainer(model_predict_flat, bg_combined)
+        explainer = shap.KernelExplainer(model_predict_flat, _background_inputs())
+    return explainer
 
-    # Calculate SHAP values for the one target sample
-    shap_vals = explainer.shap_values(combined_input, nsamples=50)
-    
-    # shap_vals is (1, num_features)
+
+def compute_shap_values(arxiv_ids: list) -> np.ndarray:
+    """
+    Run KernelExplainer for the given papers.
+
+    Returns:
+        np.ndarray: float32 SHAP values of shape (N, len(ALL_FEATURE_NAMES)).
+    """
+    combined_input = _combined_inputs(list(dict.fromkeys(arxiv_ids)))
+    shap_vals = _get_explainer().shap_values(combined_input, nsamples=SHAP_NSAMPLES)
+
+    # shap_vals is (N, num_features)
     if isinstance(shap_vals, list):
         shap_vals = shap_vals[0]
-    
-    vals = shap_vals[0]
-    
+    return np.asarray(shap_vals, dtype=np.float32).reshape(len(combined_input), -1)
+
+
+# --- Gradient explainer ---
+# Integrated gradients on ts_input / static_input, from the mean of the SHAP
+# background to the paper. Uses the model's gradients instead of treating it as
+# a black box: one forward/backward pass over IG_STEPS + 1 interpolation points
+# per batch, instead of nsamples x background-size model evaluations per paper.
+IG_STEPS = 32
+_integrated_gradients = None
+
+
+def _build_integrated_gradients():
+    import tensorflow as tf
+
+    num_static = len(STATIC_FEATURES)
+
+    @tf.function(
+        input_signature=[
+            tf.TensorSpec([None, TIME_STEPS, 1], tf.float32),
+            tf.TensorSpec([None, num_static], tf.float32),
+            tf.TensorSpec([TIME_STEPS, 1], tf.float32),
+            tf.TensorSpec([num_static], tf.float32),
+        ]
+    )
+    def integrated_gradients(ts, static, base_ts, base_static):
+        n = tf.shape(ts)[0]
+        alphas = tf.linspace(0.0, 1.0, IG_STEPS + 1)
+
+        # (steps + 1, N, ...) straight-line paths, flattened into one batch
+        ts_path = base_ts + alphas[:, None, None, None] * (ts - base_ts)[None]
+        static_path = base_static + alphas[:, None, None] * (static - base_static)[None]
+        ts_path = tf.reshape(ts_path, [-1, TIME_STEPS, 1])
+        static_path = tf.reshape(static_path, [-1, num_static])
+
+        with tf.GradientTape() as tape:
+            tape.watch([ts_path, static_path])
+            y_pred = model({'ts_input': ts_path, 'static_input': static_path}, training=False)
+        grad_ts, grad_static = tape.gradient(y_pred, [ts_path, static_path])
+
+        # Trapezoidal rule over the path
+        grad_ts = tf.reshape(grad_ts, [IG_STEPS + 1, n, TIME_STEPS])
+        grad_static = tf.reshape(grad_static, [IG_STEPS + 1, n, num_static])
+        avg_grad_ts = tf.reduce_mean((grad_ts[:-1] + grad_ts[1:]) / 2.0, axis=0)
+        avg_grad_static = tf.reduce_mean((grad_static[:-1] + grad_static[1:]) / 2.0, axis=0)
+
+        return tf.concat([
+            avg_grad_ts * (ts[:, :, 0] - base_ts[:, 0]),
+            avg_grad_static * (static - base_static),
+        ], axis=1)
+
+    return integrated_gradients
+
+
+def compute_gradient_attributions(arxiv_ids: list) -> np.ndarray:
+    """
+    Integrated-gradients attributions for the given papers, in one batched pass.
+
+    Returns:
+        np.ndarray: float32 attributions of shape (N, len(ALL_FEATURE_NAMES)).
+    """
+    global _integrated_gradients
+    if _integrated_gradients is None:
+        _integrated_gradients = _build_integrated_gradients()
+
+    combined_input = _combined_inputs(list(dict.fromkeys(arxiv_ids))).astype(np.float32)
+    baseline = _background_inputs().mean(axis=0).astype(np.float32)
+
+    attributions = _integrated_gradients(
+        combined_input[:, :TIME_STEPS, np.newaxis],
+        combined_input[:, TIME_STEPS:],
+        baseline[:TIME_STEPS, np.newaxis],
+        baseline[TIME_STEPS:],
+    )
+    return attributions.numpy()
+
+
+# 'kernel' (shap.KernelExplainer) or 'gradient' (integrated gradients)
+EXPLAINER_BACKEND = os.environ.get('EXPLAINER_BACKEND', 'kernel')
+EXPLAINER_BACKENDS = {
+    'kernel': compute_shap_values,
+    'gradient': compute_gradient_attributions,
+}
+
+
+def compute_attributions(arxiv_ids: list, backend: str = None) -> np.ndarray:
+    backend = backend or EXPLAINER_BACKEND
+    if backend not in EXPLAINER_BACKENDS:
+        raise ValueError(f"Unknown explainer backend '{backend}'. Choose from {list(EXPLAINER_BACKENDS)}.")
+    return EXPLAINER_BACKENDS[backend](arxiv_ids)
+
+
+def top_attributions(vals) -> list:
+    """
+    Turn one row of attribution values into the top-10 [{feature, weight}] list.
+    """
     # Create list of {feature, weight}
     results = []
     for name, val in zip(ALL_FEATURE_NAMES, vals):
@@ -127,8 +590,91 @@ def get_attribution(arxiv_id: str):
     return results
 
 
+# --- Precomputed attribution store ---
+# Filled offline by build_attributions.py: a float32 matrix (one row per paper,
+# memory-mapped) plus a JSON index with the ids, feature names, model version
+# and explainer backend.
+ATTRIBUTION_STORE_DIR = os.environ.get('ATTRIBUTION_STORE_DIR', 'models/attributions')
+_attribution_store = None
+
+
+def load_attribution_store(store_dir: str = ATTRIBUTION_STORE_DIR):
+    """
+    Open the precomputed store, or return None if it is missing or stale.
+
+    Returns:
+        tuple: (values memmap of shape (N, num_features), {arxiv_id: row}, backend)
+    """
+    index_path = os.path.join(store_dir, 'index.json')
+    values_path = os.path.join(store_dir, 'values.npy')
+    if not (os.path.exists(index_path) and os.path.exists(values_path)):
+        return None
+
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get('model_version') != MODEL_VERSION or index.get('feature_names') != ALL_FEATURE_NAMES:
+        print(f"Warning: attribution store {store_dir} was built for another model or feature set. Ignoring it.")
+        return None
+
+    values = np.load(values_path, mmap_mode='r')
+    row_of = {aid: i for i, aid in enumerate(index['arxiv_id'])}
+    return values, row_of, index.get('backend', 'kernel')
+
+
+def _get_attribution_store():
+    global _attribution_store
+    if _attribution_store is None:
+        _attribution_store = load_attribution_store() or (None, {}, None)
+    return _attribution_store
+
+
+def get_attributions(arxiv_ids: list, backend: str = None) -> dict:
+    """
+    Top attributions for many papers. Papers found in the precomputed store (built
+    with the same backend) are read from it, the rest are explained live in one batch.
+
+    Returns:
+        dict: Format {arxiv_id: [{feature, weight}, ...]}
+    """
+    _require_ready()
+    backend = backend or EXPLAINER_BACKEND
+    unique_ids = list(dict.fromkeys(arxiv_ids))
+    missing = [aid for aid in unique_ids if aid not in ROW_INDEX]
+    if missing:
+        raise ValueError(f"Arxiv IDs {missing} not found")
+
+    values, row_of, store_backend = _get_attribution_store()
+    results = {}
+    if store_backend == backend:
+        for aid in unique_ids:
+            row = row_of.get(aid)
+            if row is not None:
+                results[aid] = top_attributions(values[row])
+
+    to_compute = [aid for aid in unique_ids if aid not in results]
+    if to_compute:
+        computed = compute_attributions(to_compute, backend)
+        for aid, vals in zip(to_compute, computed):
+            results[aid] = top_attributions(vals)
+
+    return {aid: results[aid] for aid in unique_ids}
+
+
+def get_attribution(arxiv_id: str, backend: str = None):
+    """
+    Top attributions for a specific paper.
+    Served from the precomputed store when possible, otherwise computed live.
+    """
+    _require_ready()
+    if arxiv_id not in ROW_INDEX:
+        raise ValueError(f"Arxiv ID '{arxiv_id}' not found")
+
+    return get_attributions([arxiv_id], backend)[arxiv_id]
+
+
 if __name__ == "__main__":
-    example_ids = df.index[:5]
+    load_resources()
+    example_ids = list(ROW_INDEX)[:5]
     
     for aid in example_ids:
         print(f"\nPaper: {aid}")
@@ -0,0 +1,197 @@
+"""
+Load test for the FastAPI backend, fully offline.
+
+Starts the app in-process (httpx ASGI transport, no sockets) on a small synthetic
+LSTM and feature set with the same input shapes as the real model, then drives a
+configurable mix of concurrent requests and prints machine-readable JSON:
+throughput, p50/p95/p99 latency per scenario and peak RSS.
+
+Scenarios:
+    predict_hit   GET  /predict/{id} on a small hot set that is already cached
+    predict_miss  GET  /predict/{id} on ids not requested before
+    batch         POST /predict/batch with --batch-size random ids
+    attribution   GET  /attribution/{id}
+
+Run from the backend directory:
+    python loadtest.py --concurrency 32 --requests 2000 --mix predict_hit=4,predict_miss=4,batch=1,attribution=1
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import subprocess
+import time
+
+import numpy as np
+import pandas as pd
+
+import inference
+from benchmark import percentiles
+
+SCENARIOS = ['predict_hit', 'predict_miss', 'batch', 'attribution']
+HOT_SET_SIZE = 50
+
+
+def make_synthetic_resources(num_papers: int = 20000, num_static: int = 229, seed: int = 0):
+    """
+    A small untrained LSTM with the real model's inputs (ts_input, static_input),
+    a fitted StandardScaler and a feature frame with matching columns.
+    """
+    import tensorflow as tf
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(seed)
+    tf.keras.utils.set_random_seed(seed)
+
+    ts_input = tf.keras.Input(shape=(inference.TIME_STEPS, 1), name='ts_input')
+    static_input = tf.keras.Input(shape=(num_static,), name='static_input')
+    x = tf.keras.layers.LSTM(16)(ts_input)
+    y = tf.keras.layers.Dense(16, activation='relu')(static_input)
+    output = tf.keras.layers.Dense(1)(tf.keras.layers.Concatenate()([x, y]))
+    model = tf.keras.Model(inputs=[ts_input, static_input], outputs=output)
+
+    start_year = 2013
+    citations = rng.poisson(5.0, size=(num_papers, inference.TIME_STEPS)).astype(np.float32)
+    static = rng.normal(size=(num_papers, num_static)).astype(np.float32)
+    columns = [f'citations_{y}' for y in range(start_year, start_year + inference.TIME_STEPS)]
+    columns += [f'static_{j}' for j in range(num_static)]
+
+    features = pd.DataFrame(np.concatenate([citations, static], axis=1), columns=columns)
+    features.index = pd.Index([f'{9000 + i // 100000}.{i % 100000:05d}' for i in range(num_papers)], name='arxiv_id')
+
+    scaler = StandardScaler().fit(static)
+    return model, scaler, features
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}'. Choose from {SCENARIOS}.")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def run_load(num_requests: int, concurrency: int, mix: dict, k: int = 5, batch_size: int = 32,
+                   attribution_backend: str = 'gradient', seed: int = 0) -> dict:
+    import httpx
+    import main
+
+    ids = list(inference.ROW_INDEX)
+    rng = random.Random(seed)
+    hot_ids = ids[:HOT_SET_SIZE]
+    cold_ids = iter(ids[HOT_SET_SIZE:])
+
+    scenarios, weights = zip(*mix.items())
+    latencies = {name: [] for name in scenarios}
+    errors = {name: 0 for name in scenarios}
+    remaining = [num_requests]
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://loadtest', timeout=None) as client:
+            # Warm the cache for the hot set so predict_hit really hits, and trace the
+            # attribution graph once so one-off tracing is not reported as latency
+            await client.post('/predict/batch', json={'ids': hot_ids, 'k': k})
+            if 'attribution' in mix:
+                await client.get(f'/attribution/{hot_ids[0]}', params={'backend': attribution_backend})
+
+            def make_request(name):
+                if name == 'predict_hit':
+                    return client.get(f'/predict/{rng.choice(hot_ids)}', params={'k': k})
+                if name == 'predict_miss':
+                    aid = next(cold_ids, None)
+                    if aid is None:
+                        # Ran out of fresh ids: start over with an empty cache
+                        inference.prediction_cache.clear()
+                        aid = rng.choice(ids)
+                    return client.get(f'/predict/{aid}', params={'k': k})
+                if name == 'batch':
+                    return client.post('/predict/batch', json={'ids': rng.sample(ids, batch_size), 'k': k})
+                return client.get(f'/attribution/{rng.choice(ids)}', params={'backend': attribution_backend})
+
+            async def worker():
+                while remaining[0] > 0:
+                    remaining[0] -= 1
+                    name = rng.choices(scenarios, weights)[0]
+                    start = time.perf_counter()
+                    response = await make_request(name)
+                    latencies[name].append((time.perf_counter() - start) * 1000)
+                    if response.status_code != 200:
+                        errors[name] += 1
+
+            start = time.perf_counter()
+            await asyncio.gather(*[worker() for _ in range(concurrency)])
+            elapsed = time.perf_counter() - start
+
+        metrics_text = main.batcher.render_metrics()
+
+    completed = sum(len(v) for v in latencies.values())
+    return {
+        'commit': git_commit(),
+        'config': {
+            'requests': num_requests, 'concurrency': concurrency, 'mix': mix, 'k': k,
+            'batch_size': batch_size, 'attribution_backend': attribution_backend,
+            'num_papers': len(ids),
+        },
+        'duration_s': elapsed,
+        'throughput_rps': completed / elapsed if elapsed else 0.0,
+        'scenarios': {
+            name: {'count': len(latencies[name]), 'errors': errors[name], **percentiles(latencies[name])}
+            for name in scenarios
+        },
+        'cache': inference.prediction_cache.stats(),
+        'predict_batch_size_mean': _histogram_mean(metrics_text, 'predict_batch_size'),
+        'startup_timings': inference.startup_state()['timings'],
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _histogram_mean(metrics_text: str, name: str):
+    values = {}
+    for line in metrics_text.splitlines():
+        for suffix in ('_sum', '_count'):
+            if line.startswith(name + suffix + ' '):
+                values[suffix] = float(line.split()[-1])
+    return values['_sum'] / values['_count'] if values.get('_count') else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--mix', default='predict_hit=4,predict_miss=4,batch=1,attribution=1')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--attribution-backend', default='gradient', choices=['kernel', 'gradient'])
+    parser.add_argument('--papers', type=int, default=20000, help='Synthetic papers in the feature set')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    model, scaler, features = make_synthetic_resources(args.papers, seed=args.seed)
+    inference.load_resources(warmup=True, model_override=model, scaler_override=scaler, features_override=features)
+
+    report = asyncio.run(run_load(args.requests, args.concurrency, parse_mix(args.mix), args.k,
+                                  args.batch_size, args.attribution_backend, args.seed))
+    text = json.dumps(report, indent=4)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
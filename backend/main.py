@@ -1,9 +1,26 @@
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from inference import predict_next_k_years, get_attribution
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from typing import Optional
+from inference import (predict_many, get_attribution, get_attributions, prediction_cache,
+                       load_resources, startup_state, NotReadyError, InvalidHorizonError)
+from batcher import batcher
 
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bind the port right away; the model and features load in the background
+    threading.Thread(target=load_resources, name="load-resources", daemon=True).start()
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,22 +30,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class BatchPredictRequest(BaseModel):
+    ids: list[str]
+    k: int = 5
+
+
+class BatchAttributionRequest(BaseModel):
+    ids: list[str]
+    backend: Optional[str] = None
+
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    state = startup_state()
+    if state["status"] != "ready":
+        return JSONResponse(status_code=503, content=state)
+    return state
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(batcher.render_metrics())
+
 @app.get("/predict/{id}")
-def predict(id: str, k: int = 5):
+async def predict(id: str, k: int = 5):
     try:
         return {
             "id": id,
-            "prediction": predict_next_k_years(id, k)
+            "prediction": await batcher.submit(id, k)
         }
+    except NotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except InvalidHorizonError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+@app.post("/predict/batch")
+def predict_batch(request: BatchPredictRequest):
+    try:
+        return {
+            "k": request.k,
+            "predictions": predict_many(request.ids, request.k)
+        }
+    except NotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except InvalidHorizonError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/cache/stats")
+def cache_stats():
+    return prediction_cache.stats()
+
 @app.get("/attribution/{id}")
-def attribution(id: str):
+def attribution(id: str, backend: Optional[str] = None):
     try:
         return {
             "id": id,
-            "attribution": get_attribution(id)
+            "attribution": get_attribution(id, backend)
+        }
+    except NotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.post("/attribution/batch")
+def attribution_batch(request: BatchAttributionRequest):
+    try:
+        return {
+            "attributions": get_attributions(request.ids, request.backend)
         }
+    except NotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,264 @@
+"""
+Parity checks and benchmarks for the feature build (data_preprocessing.py) on a
+synthetic corpus, compared against the original row-by-row implementation.
+
+Run from the repository root, e.g.:
+    python benchmark_features.py citations --papers 100000 --year 2024
+    python benchmark_features.py trends --categories 2000 --year 2015
+    python benchmark_features.py venues --papers 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import linregress
+
+from citation_features import citation_matrix, citation_features, filled_dicts, category_year_totals
+from trend_features import CITATION_ANOMALY_YEARS, rolling_slopes, trend_slopes
+from venue_outliers import VenueOutlierMapper
+
+
+def synthetic_papers(num_papers: int, first_year: int = 2012, last_year: int = 2025,
+                     num_categories: int = 40, seed: int = 0) -> pd.DataFrame:
+    """Papers with the columns the citation features read, shaped like the scraped corpus."""
+    rng = np.random.default_rng(seed)
+    published_year = rng.integers(first_year, last_year, size=num_papers)
+    cbys, counts = [], []
+    for py in published_year:
+        years = [y for y in range(py - 1, last_year + 1) if rng.random() < 0.7]
+        cby = {str(y): int(rng.poisson(5 + 3 * max(y - py, 0))) for y in years}
+        cbys.append(cby)
+        counts.append(sum(cby.values()) + int(rng.integers(0, 5)))
+    return pd.DataFrame({
+        'published_year': published_year.astype(np.int32),
+        'primary_category': rng.integers(0, num_categories, size=num_papers),
+        'citationCount': counts,
+        'citations_by_year': cbys,
+    })
+
+
+def reference_citation_features(df: pd.DataFrame, year: int):
+    """The per-row implementation data_preprocessing.pipeline used before the matrix version."""
+    df = df.copy()
+
+    def fill_citations_by_year(row):
+        citations_by_year = row['citations_by_year']
+        published_year = row['published_year']
+        result = {}
+        for y in range(published_year, year+1):
+            citation = citations_by_year.get(f'{y}', 0)
+            result[f'{y}'] = citation
+        return result
+
+    df['citations_by_year'] = df.apply(fill_citations_by_year, axis=1)
+
+    def adjust_citation_count(row):
+        citations = row.get("citations_by_year", {})
+        total = row.get("citationCount", 0)
+        if not isinstance(citations, dict):
+            return total
+        future_citations = sum(
+            v for k, v in citations.items()
+            if isinstance(k, (int, str)) and str(k).isdigit() and int(k) > year-1
+        )
+        return max(total - future_citations, 0)
+
+    df["citationCount"] = df.apply(adjust_citation_count, axis=1)
+    df["citations"] = df["citations_by_year"].apply(lambda x: x.get(f"{year}", 0) if isinstance(x, dict) else 0)
+
+    records = []
+    for _, row in df.iterrows():
+        for y, c in row['citations_by_year'].items():
+            records.append({'primary_category': row['primary_category'], 'published_year': int(y), 'citations': c})
+    citations_long = pd.DataFrame(records)
+    citations_trend = (
+        citations_long[~citations_long['published_year'].isin(CITATION_ANOMALY_YEARS)]
+        .groupby(['primary_category', 'published_year'])['citations']
+        .sum()
+        .reset_index(name='total_citations')
+    )
+
+    def values_before(citations_by_year):
+        return [v for k, v in citations_by_year.items() if str(k).isdigit() and int(k) <= year]
+
+    df['mean_citations_over_years'] = df['citations_by_year'].apply(
+        lambda x: float(np.mean(values_before(x))) if values_before(x) else 0.0)
+    df['std_citations_over_years'] = df['citations_by_year'].apply(
+        lambda x: float(np.std(values_before(x))) if values_before(x) else 0.0)
+    return df, citations_trend
+
+
+def matrix_citation_features(df: pd.DataFrame, year: int):
+    df = df.copy()
+    matrix, years = citation_matrix(df['citations_by_year'], df['published_year'], year)
+    stats = citation_features(matrix, years, df['published_year'], df['citationCount'], year)
+    df['citations_by_year'] = filled_dicts(matrix, years, df['published_year'], year)
+    for column, values in stats.items():
+        df[column] = values
+    citations_trend = category_year_totals(matrix, years, df['published_year'], df['primary_category'],
+                                           year, exclude_years=CITATION_ANOMALY_YEARS)
+    return df, citations_trend
+
+
+def check_citation_parity(reference, candidate) -> None:
+    ref_df, ref_trend = reference
+    new_df, new_trend = candidate
+    assert ref_df['citations_by_year'].tolist() == new_df['citations_by_year'].tolist()
+    for column in ['citationCount', 'citations', 'mean_citations_over_years']:
+        np.testing.assert_array_equal(ref_df[column].to_numpy(), new_df[column].to_numpy(), err_msg=column)
+    # Same values, summed in a different order: equal up to the last bit
+    np.testing.assert_allclose(ref_df['std_citations_over_years'], new_df['std_citations_over_years'],
+                               rtol=1e-12, atol=0)
+    pd.testing.assert_frame_equal(ref_trend, new_trend, check_dtype=False)
+
+
+def bench_citations(num_papers: int = 100000, year: int = 2024, parity_papers: int = 20000) -> dict:
+    """Time both implementations on num_papers papers, after checking they agree on a sample."""
+    df = synthetic_papers(num_papers)
+    sample = df.head(parity_papers)
+    check_citation_parity(reference_citation_features(sample, year), matrix_citation_features(sample, year))
+
+    results = {'papers': num_papers, 'year': year, 'parity_papers': len(sample)}
+    for name, fn in [('row_wise', reference_citation_features), ('matrix', matrix_citation_features)]:
+        start = time.perf_counter()
+        fn(df, year)
+        results[f'{name}_s'] = round(time.perf_counter() - start, 3)
+    results['speedup'] = round(results['row_wise_s'] / results['matrix_s'], 1)
+    return results
+
+
+def safe_slope(g, year_col, value_col, x0):
+    """The per-group slope data_preprocessing.pipeline computed with groupby().apply()."""
+    g = g[g[year_col] > x0]
+    if len(g) < 2:
+        return 0
+    return linregress(g[year_col], g[value_col]).slope
+
+
+def synthetic_trend(num_categories: int, first_year: int = 2012, last_year: int = 2025, seed: int = 0):
+    """A (primary_category, published_year, total) table with gaps, like citations_trend."""
+    rng = np.random.default_rng(seed)
+    cats, years = np.meshgrid(np.arange(num_categories), np.arange(first_year, last_year + 1), indexing='ij')
+    trend = pd.DataFrame({'primary_category': cats.ravel(), 'published_year': years.ravel()})
+    trend = trend[rng.random(len(trend)) < 0.8].reset_index(drop=True)
+    trend['total'] = rng.poisson(1000, size=len(trend)) + 50 * (trend['published_year'] - first_year)
+    return trend
+
+
+def reference_slopes(trend, x0):
+    return trend.groupby('primary_category').apply(
+        lambda g: safe_slope(g, 'published_year', 'total', x0), include_groups=False)
+
+
+def bench_trends(num_categories: int = 2000, year: int = 2015, window: int = 5) -> dict:
+    """Slopes after `year` per category, and trailing-window slopes for every year."""
+    trend = synthetic_trend(num_categories)
+    end_years = sorted(trend['published_year'].unique())
+
+    results = {'categories': num_categories, 'points': len(trend), 'year': year}
+    start = time.perf_counter()
+    reference = reference_slopes(trend, year)
+    results['apply_s'] = round(time.perf_counter() - start, 3)
+    start = time.perf_counter()
+    slopes = trend_slopes(trend, 'total', year)
+    results['vectorized_s'] = round(time.perf_counter() - start, 3)
+    results['speedup'] = round(results['apply_s'] / results['vectorized_s'], 1)
+
+    # linregress and the exact integer sums differ only by rounding
+    assert reference.index.equals(slopes.index)
+    np.testing.assert_allclose(reference.to_numpy(), slopes.to_numpy(), rtol=1e-9, atol=1e-9)
+    # Edge cases of safe_slope: nothing after x0 keeps the int 0 column
+    assert trend_slopes(trend, 'total', max(end_years)).equals(reference_slopes(trend, max(end_years)))
+
+    start = time.perf_counter()
+    rolling = rolling_slopes(trend['primary_category'], trend['published_year'], trend['total'], end_years, window)
+    results['rolling_s'] = round(time.perf_counter() - start, 3)
+    for end in end_years[::4]:
+        in_window = trend[(trend['published_year'] > end - window) & (trend['published_year'] <= end)]
+        expected = reference_slopes(in_window, end - window).reindex(rolling.index, fill_value=0)
+        np.testing.assert_allclose(expected.to_numpy(), rolling[end].to_numpy(), rtol=1e-9, atol=1e-9)
+    return results
+
+
+def reference_venue_rankings(df: pd.DataFrame) -> pd.Series:
+    """The iterrows() reassignment data_preprocessing.pipeline used before VenueOutlierMapper."""
+    df = df.copy()
+    venue_medians = (
+        df[df['venue_ranking'] != 'Other']
+        .groupby('venue_ranking')['citationCount']
+        .median()
+        .to_dict()
+    )
+    other_group = df[df['venue_ranking'] == 'Other']
+    Q1 = np.percentile(other_group['citationCount'], 25)
+    Q3 = np.percentile(other_group['citationCount'], 75)
+    IQR = Q3 - Q1
+    outliers_other = other_group[
+        (other_group['citationCount'] < Q1 - 1.5 * IQR) |
+        (other_group['citationCount'] > Q3 + 1.5 * IQR)
+    ]
+    for idx, row in outliers_other.iterrows():
+        df.at[idx, 'venue_ranking'] = min(venue_medians.keys(),
+                                          key=lambda k: abs(venue_medians[k] - row['citationCount']))
+    return df['venue_ranking']
+
+
+def bench_venues(num_papers: int = 100000, seed: int = 0) -> dict:
+    """Loop vs fitted mapper on papers whose rankings share medians, so ties are exercised."""
+    rng = np.random.default_rng(seed)
+    rankings = np.array(['A*', 'A', 'B', 'C', 'Q1', 'Q2', 'Q3', 'Q4', 'Other'], dtype=object)
+    df = pd.DataFrame({
+        'venue_ranking': rng.choice(rankings, size=num_papers, p=[0.02] * 8 + [0.84]),
+        'citationCount': rng.geometric(0.02, size=num_papers),
+    })
+    # Two rankings with the same median: min() keeps the first key, argmin must too
+    df.loc[df['venue_ranking'].isin(['Q2', 'Q3']), 'citationCount'] = 120
+
+    results = {'papers': num_papers}
+    start = time.perf_counter()
+    reference = reference_venue_rankings(df)
+    results['iterrows_s'] = round(time.perf_counter() - start, 3)
+    start = time.perf_counter()
+    mapper = VenueOutlierMapper().fit(df['venue_ranking'], df['citationCount'])
+    mapped = mapper.transform(df['venue_ranking'], df['citationCount'])
+    results['mapper_s'] = round(time.perf_counter() - start, 3)
+    results['speedup'] = round(results['iterrows_s'] / results['mapper_s'], 1)
+    results['outliers'] = int(mapper.outliers(df['venue_ranking'], df['citationCount']).sum())
+
+    assert list(mapped) == list(reference)
+    # The saved state reproduces the mapping without the data
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'venue_outliers.json')
+        mapper.save(path)
+        assert list(VenueOutlierMapper.load(path).transform(df['venue_ranking'], df['citationCount'])) == list(reference)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    citations = sub.add_parser('citations', help='Citation features: row-wise vs matrix')
+    citations.add_argument('--papers', type=int, default=100000)
+    citations.add_argument('--year', type=int, default=2024)
+    citations.add_argument('--parity-papers', type=int, default=20000)
+
+    trends = sub.add_parser('trends', help='Category trend slopes: groupby().apply(linregress) vs grouped sums')
+    trends.add_argument('--categories', type=int, default=2000)
+    trends.add_argument('--year', type=int, default=2015)
+    trends.add_argument('--window', type=int, default=5)
+
+    venues = sub.add_parser('venues', help='"Other" venue outliers: iterrows() vs VenueOutlierMapper')
+    venues.add_argument('--papers', type=int, default=100000)
+
+    args = parser.parse_args()
+    if args.command == 'citations':
+        print(json.dumps(bench_citations(args.papers, args.year, args.parity_papers), indent=2))
+    elif args.command == 'trends':
+        print(json.dumps(bench_trends(args.categories, args.year, args.window), indent=2))
+    elif args.command == 'venues':
+        print(json.dumps(bench_venues(args.papers), indent=2))
@@ -1,26 +1,17 @@
-import json
-from pipeline import ScraperPipeline
 import os
+from corpus_store import CORPUS_ROOT, scan_corpus
 
-for y in range(2012, 2025):
-    base_dir = f"data (Copy)/{y}"
-    paper_files = os.listdir(base_dir)
+# Validate every paper in one parallel pass (see corpus_store.py) and drop the files missing required fields
+_, invalid, unreadable = scan_corpus(CORPUS_ROOT, range(2012, 2025))
+for path, reason in invalid:
+    paper_id = os.path.basename(path).replace('.json', '')
+    print(f"Paper {paper_id}: {reason}. Dropping...")
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        continue
 
-    sp = ScraperPipeline()
-
-    for paper_file in paper_files:
-        paper_id =  paper_file.replace('.json', '')
-        with open(base_dir+f"/{paper_file}", 'r', encoding='utf-8') as f:
-            paper = json.load(f)
-        # Validate required fields
-        required_fields = ['arxiv_id', 'title', 'abstract', 'authors', 'categories', 'published_date', 'num_revisions', 'references']
-        for field in required_fields:
-            if field not in paper or paper[field] in [None, '', [], {}]:
-                # if field != 'references':
-                #     print(f"Paper {paper_id} is missing required field: {field}.")
-                #     continue
-                print(f"Paper {paper_id} is missing required field: {field}. Dropping...")
-                try:
-                    os.remove(base_dir+f"/{paper_file}")
-                except FileNotFoundError:
-                    continue
\ No newline at end of file
+# Files that failed to parse are only reported: they may hold valid data a parser fix can recover
+for path, error in unreadable:
+    paper_id = os.path.basename(path).replace('.json', '')
+    print(f"Paper {paper_id}: unreadable ({error}). Keeping {path} for inspection.")
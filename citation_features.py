@@ -0,0 +1,114 @@
+"""
+Citation features on a dense (papers x years) matrix.
+
+`citations_by_year` arrives as one {"<year>": count} dict per paper. It is turned
+into an int32 matrix once; the per-year features of data_preprocessing.pipeline
+(fill, leakage trimming, target, mean/std so far, category totals) are then
+masked NumPy reductions over that matrix instead of Python loops over dicts.
+"""
+import numpy as np
+import pandas as pd
+
+
+def citation_matrix(citations_by_year, published_year, last_year: int = None):
+    """
+    Args:
+        citations_by_year: Sequence of {"<year>": count} dicts (non-dicts count as empty).
+        published_year: Publication year of every paper.
+        last_year (int): Make sure the matrix reaches at least this year.
+
+    Returns:
+        (matrix, years): int32 array (num_papers, num_years) and the year of each column.
+    """
+    published_year = np.asarray(published_year, dtype=np.int64)
+    rows, cols, values = [], [], []
+    for i, cby in enumerate(citations_by_year):
+        if not isinstance(cby, dict):
+            continue
+        for key, value in cby.items():
+            if str(key).isdigit():
+                rows.append(i)
+                cols.append(int(key))
+                values.append(value)
+
+    cols = np.asarray(cols, dtype=np.int64)
+    bounds = np.concatenate([published_year, cols, [last_year] if last_year is not None else []]).astype(np.int64)
+    first, last = (bounds.min(), bounds.max()) if len(bounds) else (0, -1)
+    years = np.arange(first, last + 1)
+
+    matrix = np.zeros((len(published_year), len(years)), dtype=np.int32)
+    if len(rows):
+        matrix[np.asarray(rows), cols - first] = np.asarray(values, dtype=np.int32)
+    return matrix, years
+
+
+def observed_mask(years, published_year, year: int):
+    """True where a paper's filled series has an entry: published_year <= y <= year."""
+    published_year = np.asarray(published_year)[:, None]
+    return (years[None, :] >= published_year) & (years[None, :] <= year)
+
+
+def citation_features(matrix, years, published_year, citation_count, year: int) -> dict:
+    """
+    The per-paper citation features of pipeline(df, year).
+
+    Returns:
+        dict of arrays: citationCount (total minus the `year` citations, floored at 0),
+        citations (the `year` target), mean_citations_over_years and
+        std_citations_over_years (over the filled years up to `year`).
+    """
+    mask = observed_mask(years, published_year, year)
+    counts = mask.sum(axis=1)
+    filled = np.where(mask, matrix, 0).astype(np.int64)
+
+    column = np.searchsorted(years, year)
+    if column < len(years) and years[column] == year:
+        target = filled[:, column]
+    else:
+        target = np.zeros(len(filled), dtype=np.int64)
+
+    # Only `year` itself is both filled and later than year - 1
+    citation_count = np.asarray(citation_count)
+    adjusted = np.maximum(citation_count - target, 0).astype(citation_count.dtype)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(counts > 0, filled.sum(axis=1) / counts, 0.0)
+        var = np.where(counts > 0, (np.where(mask, filled - mean[:, None], 0.0) ** 2).sum(axis=1) / counts, 0.0)
+    return {
+        'citationCount': adjusted,
+        'citations': target,
+        'mean_citations_over_years': mean,
+        'std_citations_over_years': np.sqrt(var),
+    }
+
+
+def filled_dicts(matrix, years, published_year, year: int) -> list:
+    """The filled {"<year>": count} dict of every paper, as the CSV output keeps it."""
+    labels = [str(y) for y in years]
+    # The filled years of a paper are one contiguous run of columns
+    starts = np.clip(np.asarray(published_year) - years[0], 0, len(years))
+    stop = int(np.clip(year - years[0] + 1, 0, len(years)))
+    return [dict(zip(labels[start:stop], row[start:stop].tolist())) for start, row in zip(starts.tolist(), matrix)]
+
+
+def category_year_totals(matrix, years, published_year, categories, year: int, exclude_years=()) -> pd.DataFrame:
+    """
+    Citations summed per (category, year) over the filled series, for every pair at
+    least one paper has an entry for. Same rows, in the same order, as grouping the
+    long (category, year, citations) table, without building it.
+    """
+    mask = observed_mask(years, published_year, year)
+    keep = ~np.isin(years, list(exclude_years))
+    mask = mask[:, keep]
+    filled = np.where(mask, matrix[:, keep], 0).astype(np.int64)
+
+    groups = np.asarray(categories)
+    totals = pd.DataFrame(filled).groupby(groups).sum()
+    present = pd.DataFrame(mask).groupby(groups).any().to_numpy()
+
+    cat_idx, year_idx = np.nonzero(present)
+    return pd.DataFrame({
+        'primary_category': totals.index.to_numpy()[cat_idx],
+        'published_year': years[keep][year_idx],
+        'total_citations': totals.to_numpy()[cat_idx, year_idx],
+    })
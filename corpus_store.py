@@ -0,0 +1,131 @@
+"""
+Read the scraped per-paper JSON tree once and keep it as one consolidated file.
+
+    data (Copy)/<year>/<arxiv_id>.json  ->  corpus.pkl
+
+Files are parsed in parallel (orjson when installed, json otherwise), validated
+against REQUIRED_FIELDS and written as a single DataFrame with one column per
+field plus `folder_year`. Feature builds then load that file instead of walking
+the tree again for every year.
+
+Usage:
+    python corpus_store.py --root "data (Copy)" --output corpus.pkl
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CORPUS_ROOT = Path("data (Copy)")
+CORPUS_PATH = 'corpus.pkl'
+YEARS = range(2012, 2025)
+REQUIRED_FIELDS = ['arxiv_id', 'title', 'abstract', 'authors', 'categories', 'published_date', 'num_revisions', 'references']
+# Files per task: large enough that process overhead stays small next to parsing
+CHUNK_SIZE = 256
+
+
+def missing_fields(paper: dict) -> list:
+    return [field for field in REQUIRED_FIELDS if field not in paper or paper[field] in [None, '', [], {}]]
+
+
+def _loads(data: bytes):
+    if orjson is None:
+        return json.loads(data)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson rejects the bare NaN/Infinity tokens json.dump writes for missing numbers
+        return json.loads(data)
+
+
+def _read_chunk(paths: list, folder_year: int):
+    records, invalid, unreadable = [], [], []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                paper = _loads(f.read())
+        except Exception as e:
+            unreadable.append((str(path), str(e)))
+            continue
+        missing = missing_fields(paper)
+        if missing:
+            invalid.append((str(path), f"missing {', '.join(missing)}"))
+            continue
+        paper['folder_year'] = folder_year
+        records.append(paper)
+    return records, invalid, unreadable
+
+
+def scan_corpus(root_dir=CORPUS_ROOT, years=YEARS, num_workers: int = None):
+    """
+    Parse and validate every <root_dir>/<year>/*.json once, in parallel.
+
+    Returns:
+        (records, invalid, unreadable): valid papers in folder-year then file-name
+        order, (path, reason) for every parsed file missing required fields, and
+        (path, error) for every file that could not be read or parsed.
+    """
+    tasks = []
+    for year in years:
+        paths = sorted(Path(root_dir, str(year)).glob("*.json"))
+        tasks += [(paths[i:i + CHUNK_SIZE], year) for i in range(0, len(paths), CHUNK_SIZE)]
+
+    records, invalid, unreadable = [], [], []
+    if not tasks:
+        return records, invalid, unreadable
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        # map keeps task order, so the result is deterministic
+        for chunk_records, chunk_invalid, chunk_unreadable in executor.map(_read_chunk, *zip(*tasks)):
+            records += chunk_records
+            invalid += chunk_invalid
+            unreadable += chunk_unreadable
+    return records, invalid, unreadable
+
+
+def build_corpus(root_dir=CORPUS_ROOT, years=YEARS, output_path: str = CORPUS_PATH, num_workers: int = None):
+    start = time.perf_counter()
+    records, invalid, unreadable = scan_corpus(root_dir, years, num_workers)
+    for path, reason in invalid:
+        print(f"⚠️ Skipping {path}: {reason}")
+    for path, error in unreadable:
+        print(f"⚠️ Skipping {path}: unreadable: {error}")
+
+    df = pd.DataFrame(records)
+    tmp_path = output_path + '.tmp'
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, output_path)
+    print(f"Wrote {len(df)} papers ({len(invalid) + len(unreadable)} skipped) to {output_path} in {time.perf_counter() - start:.1f}s")
+    return df
+
+
+def load_corpus(path: str = CORPUS_PATH):
+    return pd.read_pickle(path)
+
+
+def papers_until(corpus, year: int):
+    """
+    Papers from the folders up to `year`, one row per arxiv_id (the earliest folder
+    wins), without the folder_year bookkeeping column.
+    """
+    df = corpus[corpus['folder_year'] <= year].drop(columns='folder_year')
+    return df.drop_duplicates(subset='arxiv_id')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=str(CORPUS_ROOT))
+    parser.add_argument('--years', type=int, nargs='+', default=list(YEARS))
+    parser.add_argument('--output', default=CORPUS_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    build_corpus(args.root, args.years, args.output, args.workers)
@@ -1,10 +1,15 @@
-import json
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from pathlib import Path
 import re
 import numpy as np
 from sklearn.preprocessing import LabelEncoder
-from scipy.stats import linregress
+from citation_features import citation_matrix, citation_features, filled_dicts, category_year_totals
+from trend_features import PAPER_ANOMALY_YEARS, CITATION_ANOMALY_YEARS, trend_slopes
+from venue_outliers import VenueOutlierMapper
+from corpus_store import CORPUS_ROOT, CORPUS_PATH, YEARS, build_corpus, load_corpus
 
 def normalize_category(cat):
     match = re.search(r'\((.*?)\)', cat)
@@ -40,15 +45,18 @@ def extract_author_stats(authors_list):
         "max_i10_index": np.max(i10),
     })
 
-def safe_slope(g, year_col, value_col, x0):
-    g = g[g[year_col] > x0]
-    if len(g) < 2:
-        return 0
-    return linregress(g[year_col], g[value_col]).slope
+AUTHOR_COLUMNS = ['num_authors', 'mean_citations', 'max_citations', 'mean_h_index', 'max_h_index',
+                  'mean_i10_index', 'max_i10_index']
 
-def pipeline(df, year):
-    # Create dataset for predicting {year} citation
 
+def prepare_papers(df, last_year: int):
+    """
+    Year-independent part of the feature build, run once over every paper.
+
+    Returns:
+        (papers, matrix, matrix_years): the cleaned papers (venue, categories, author
+        statistics) and their citations_by_year as a dense matrix (see citation_features.py).
+    """
     venue_df = pd.json_normalize(df['venue'], sep='.')
     venue_df.index = df.index
     df = pd.concat([df, venue_df], axis=1)
@@ -81,68 +89,8 @@ def pipeline(df, year):
     
     df['published_date'] = pd.to_datetime(df['published_date'])
     df['published_year'] = df['published_date'].dt.year
-    
-    def fill_citations_by_year(row):
-        citations_by_year = row['citations_by_year']
-        published_year = row['published_year']
-        result = {}
-        for y in range(published_year, year+1):
-            citation = citations_by_year.get(f'{y}', 0)
-            result[f'{y}'] = citation
-        return result
-
-    df['citations_by_year'] = df.apply(fill_citations_by_year, axis=1)
-
-    # Assign outliers' venue ranking by their nearest median
-    df['venue_ranking'] = df['venue_ranking'].apply(normalize_ranking)
-
-    # Remove citations_by_years after {year-1} to avoid data leakage
-    def adjust_citation_count(row):
-        citations = row.get("citations_by_year", {})
-        total = row.get("citationCount", 0)
-
-        if not isinstance(citations, dict):
-            return total
-
-        future_citations = sum(
-            v for k, v in citations.items()
-            if isinstance(k, (int, str)) and str(k).isdigit() and int(k) > year-1
-        )
-
-        return max(total - future_citations, 0)
-
-    df["citationCount"] = df.apply(adjust_citation_count, axis=1)
-    df[f"citations"] = df["citations_by_year"].apply(
-        lambda x: x.get(f"{year}", 0) if isinstance(x, dict) else 0
-    )    
-    df["citationCount_log"] = np.log1p(df["citationCount"])
-    df[f"citations_log"] = np.log1p(df[f"citations"])
-    
-    venue_medians = (
-        df[df['venue_ranking'] != 'Other']
-        .groupby('venue_ranking')['citationCount']
-        .median()
-        .to_dict()
-    )
 
-    other_group = df[df['venue_ranking'] == 'Other']
-    Q1 = np.percentile(other_group['citationCount'], 25)
-    Q3 = np.percentile(other_group['citationCount'], 75)
-    IQR = Q3 - Q1
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-
-    outliers_other = other_group[
-        (other_group['citationCount'] < lower_bound) |
-        (other_group['citationCount'] > upper_bound)
-    ]
-
-    def nearest_venue(citation, medians):
-        return min(medians.keys(), key=lambda k: abs(medians[k] - citation))
-
-    for idx, row in outliers_other.iterrows():
-        nearest = nearest_venue(row['citationCount'], venue_medians)
-        df.at[idx, 'venue_ranking'] = nearest
+    df['venue_ranking'] = df['venue_ranking'].apply(normalize_ranking)
 
     # Number of authors
     def count_authors(authors):
@@ -154,6 +102,36 @@ def pipeline(df, year):
     author_features = df["authors"].apply(extract_author_stats)
     df = pd.concat([df, author_features], axis=1)
 
+    # citations_by_year as a dense (papers x years) matrix; every citation feature is computed on it
+    matrix, matrix_years = citation_matrix(df['citations_by_year'], df['published_year'], last_year)
+    return df, matrix, matrix_years
+
+
+def year_features(papers, matrix, matrix_years, year):
+    """
+    Year-dependent part: the dataset for predicting {year} citations from the
+    papers (and their matrix rows) known up to {year}.
+
+    Returns:
+        (df, numeric_df, venue_outliers): the datasets and the fitted VenueOutlierMapper.
+    """
+    df = papers.copy()
+    citation_stats = citation_features(matrix, matrix_years, df['published_year'], df['citationCount'], year)
+    # Keep only the years from publication to {year}, missing years as 0
+    df['citations_by_year'] = filled_dicts(matrix, matrix_years, df['published_year'], year)
+
+    # Remove citations_by_years after {year-1} to avoid data leakage
+    df["citationCount"] = citation_stats['citationCount']
+    df[f"citations"] = citation_stats['citations']
+    df["citationCount_log"] = np.log1p(df["citationCount"])
+    df[f"citations_log"] = np.log1p(df[f"citations"])
+    # Author columns come after the targets, as in the per-year layout
+    df = df[[c for c in df.columns if c not in AUTHOR_COLUMNS] + AUTHOR_COLUMNS]
+    
+    # Assign outliers' venue ranking by their nearest median (see venue_outliers.py)
+    venue_outliers = VenueOutlierMapper().fit(df['venue_ranking'], df['citationCount'])
+    df['venue_ranking'] = venue_outliers.transform(df['venue_ranking'], df['citationCount'])
+
     # Encoding
     df['venue_type'] = df['venue_type'].map({'preprint':0, 'conference':1, 'journal':2})
     df['venue_ranking'] = df['venue_ranking'].map({'Q4':1, 'Q3':2, 'Q2':3, 'Q1':4, 'C': 1, 'B':2, 'A':3, 'A*':4, 'Other':0})
@@ -164,72 +142,19 @@ def pipeline(df, year):
     # Add slope of trend for each category (based on number of papers and citations in each category over time)
     # Exclude anomaly years for papers
     papers_trend = (
-        df[~df['published_year'].isin([2020])]
+        df[~df['published_year'].isin(PAPER_ANOMALY_YEARS)]
         .groupby(['primary_category', 'published_year'])
         .size()
         .reset_index(name='num_papers')
     )
 
     # Exclude anomaly years for citations
-    records = []
-
-    for _, row in df.iterrows():
-        cat = row['primary_category']
-        cby = row['citations_by_year']
-
-        if not isinstance(cby, dict):
-            continue
-
-        for y, c in cby.items():
-            try:
-                y = int(y)
-            except ValueError:
-                continue
-
-            records.append({
-                'primary_category': cat,
-                'published_year': y,
-                'citations': c
-            })
-
-    citations_long = pd.DataFrame(records)
-    citations_trend = (
-    citations_long[~citations_long['published_year'].isin([2023, 2024, 2025])]
-    .groupby(['primary_category', 'published_year'])['citations']
-    .sum()
-    .reset_index(name='total_citations')
-    )
-
-    # Compute slopes
-    slope_papers = (
-        papers_trend
-        .groupby('primary_category')
-        .apply(
-            lambda g: safe_slope(
-                g,
-                'published_year',   # ✅ column name
-                'num_papers',       # ✅ column name
-                year
-            ),
-            include_groups=False
-        )
-        .reset_index(name='slope_papers')
-    )
+    citations_trend = category_year_totals(matrix, matrix_years, df['published_year'], df['primary_category'],
+                                           year, exclude_years=CITATION_ANOMALY_YEARS)
 
-    slope_citations = (
-        citations_trend
-        .groupby('primary_category')
-        .apply(
-            lambda g: safe_slope(
-                g,
-                'published_year',   # ✅ column name
-                'total_citations',  # ✅ column name
-                year
-            ),
-            include_groups=False
-        )
-        .reset_index(name='slope_citations')
-    )
+    # Compute slopes (see trend_features.py)
+    slope_papers = trend_slopes(papers_trend, 'num_papers', year).reset_index(name='slope_papers')
+    slope_citations = trend_slopes(citations_trend, 'total_citations', year).reset_index(name='slope_citations')
 
     # Combine
     trend_df = slope_papers.merge(slope_citations, on='primary_category', how='outer')
@@ -239,75 +164,128 @@ def pipeline(df, year):
     
     # Add statistics about citations over years (mean, std)
 
-    def get_mean_before(citations_by_year, year):
-        if not isinstance(citations_by_year, dict):
-            return 0.0
-
-        values = [
-            v for k, v in citations_by_year.items()
-            if str(k).isdigit() and int(k) <= year
-        ]
-
-        return float(np.mean(values)) if values else 0.0
+    df['mean_citations_over_years'] = citation_stats['mean_citations_over_years']
+    df['std_citations_over_years'] = citation_stats['std_citations_over_years']
+    # df.drop(columns = "citationCount", inplace=True)
+    # df.drop(columns = f"citations", inplace=True)
 
+    return df, numeric_features(df), venue_outliers
 
-    def get_std_before(citations_by_year, year):
-        if not isinstance(citations_by_year, dict):
-            return 0.0
 
-        values = [
-            v for k, v in citations_by_year.items()
-            if str(k).isdigit() and int(k) <= year
-        ]
+def numeric_features(df):
+    numeric_df = df.select_dtypes(include=["number"])
+    numeric_df = numeric_df.drop(columns=['published_year'])
+    return numeric_df.fillna(0)
 
-        return float(np.std(values)) if values else 0.0
 
-    df['mean_citations_over_years'] = df['citations_by_year'].apply(lambda x: get_mean_before(x, year))
-    df['std_citations_over_years'] = df['citations_by_year'].apply(lambda x: get_std_before(x, year))
-    # df.drop(columns = "citationCount", inplace=True)
-    # df.drop(columns = f"citations", inplace=True)
+def pipeline(df, year):
+    # Create dataset for predicting {year} citation
+    papers, matrix, matrix_years = prepare_papers(df, year)
+    df, numeric_df, _ = year_features(papers, matrix, matrix_years, year)
 
-    numeric_df = df.select_dtypes(include=["number"])
-    numeric_df.drop(columns=['published_year'], inplace=True)
-    numeric_df = numeric_df.fillna(0)
-    
     df.to_csv(f"features_{year}.csv", index=False)
     numeric_df.to_csv(f"numeric_features_{year}.csv", index=False)
     return df, numeric_df
 
-if __name__ == '__main__':
-    root_dir = Path("data (Copy)")
 
-    target_folders = []
-    for year in range(2012, 2025):
-        target_folders.append(f'{year}')
 
-        records = []
+FEATURES_DIR = 'features'
+
+# Set once per worker process by _init_worker
+_state = None
 
-        for folder in target_folders:
-            folder_path = root_dir / folder
 
-            print(f"📂 Scanning: {folder_path}")
+def _init_worker(state):
+    global _state
+    _state = state
 
-            # Loop through all json files in the folder
-            for json_file in folder_path.glob("*.json"):
 
-                # Read JSON
-                try:
-                    with open(json_file, "r") as f:
-                        data = json.load(f)
-                except Exception as e:
-                    print(f"⚠️ Failed to read {json_file}: {e}")
-                    continue
+def partition_path(output_dir: str, year: int) -> str:
+    return os.path.join(output_dir, f'features_{year}.pkl')
 
 
-                records.append(data)
+def venue_outliers_path(output_dir: str, year: int) -> str:
+    return os.path.join(output_dir, f'venue_outliers_{year}.json')
+
+
+def _build_year(year):
+    papers, matrix, matrix_years, folder_year, output_dir, write_csv = _state
+    # Papers known up to {year}: the same rows papers_until(corpus, year) selects
+    known = folder_year <= year
+    df, numeric_df, venue_outliers = year_features(papers[known], matrix[known], matrix_years, year)
+
+    path = partition_path(output_dir, year)
+    df.to_pickle(path + '.tmp')
+    os.replace(path + '.tmp', path)
+    # Fitted venue medians and IQR bounds, to map new papers the same way
+    venue_outliers.save(venue_outliers_path(output_dir, year))
+    if write_csv:
+        df.to_csv(f"features_{year}.csv", index=False)
+        numeric_df.to_csv(f"numeric_features_{year}.csv", index=False)
+    return year, len(df)
+
+
+def build_features(corpus, years=YEARS, output_dir: str = FEATURES_DIR, num_workers: int = None,
+                   write_csv: bool = False):
+    """
+    Build every year's dataset in one run: prepare_papers once over the corpus, then
+    year_features per year (in a process pool when num_workers > 1), written as one
+    partition per year under output_dir.
+    """
+    start = time.perf_counter()
+    # The corpus is in folder-year order, so this keeps each paper's earliest folder, as papers_until does
+    corpus = corpus.drop_duplicates(subset='arxiv_id')
+    papers, matrix, matrix_years = prepare_papers(corpus.drop(columns='folder_year'), max(years))
+    folder_year = corpus['folder_year'].loc[papers.index].to_numpy()
+    print(f"Prepared {len(papers)} papers in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(output_dir, exist_ok=True)
+    state = (papers, matrix, matrix_years, folder_year, output_dir, write_csv)
+    if num_workers and num_workers > 1:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(state,)) as executor:
+            for year, n in executor.map(_build_year, years):
+                print(f"\tFinish extract features for {year}! ({n} papers)\n")
+    else:
+        _init_worker(state)
+        for year in years:
+            year, n = _build_year(year)
+            print(f"\tFinish extract features for {year}! ({n} papers)\n")
+    print(f"Wrote {len(years)} years to {output_dir}/ in {time.perf_counter() - start:.1f}s")
+
+
+def feature_years(output_dir: str = FEATURES_DIR) -> list:
+    return sorted(int(name[len('features_'):-len('.pkl')]) for name in os.listdir(output_dir)
+                  if name.startswith('features_') and name.endswith('.pkl'))
+
+
+def load_features(output_dir: str = FEATURES_DIR, years=None, numeric: bool = False):
+    """
+    All partitions (or only `years`) as one DataFrame with a `year` column. With
+    numeric=True, each partition is reduced to its numeric features first, as the
+    numeric_features_{year}.csv files were.
+    """
+    if years is None:
+        years = feature_years(output_dir)
+    frames = []
+    for year in years:
+        df = pd.read_pickle(partition_path(output_dir, year))
+        frames.append((numeric_features(df) if numeric else df).assign(year=year))
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the per-year feature datasets from the scraped corpus.")
+    parser.add_argument('--years', type=int, nargs='+', default=list(YEARS))
+    parser.add_argument('--output', default=FEATURES_DIR, help='Directory of the per-year partitions')
+    parser.add_argument('--workers', type=int, default=None, help='Build years in parallel processes')
+    parser.add_argument('--csv', action='store_true',
+                        help='Also write features_{year}.csv and numeric_features_{year}.csv')
+    args = parser.parse_args()
+
+    # Parse the JSON tree once (see corpus_store.py) instead of re-reading every earlier year per year
+    if os.path.exists(CORPUS_PATH):
+        corpus = load_corpus(CORPUS_PATH)
+    else:
+        corpus = build_corpus(CORPUS_ROOT, YEARS, CORPUS_PATH)
 
-        # Create dataframe
-        df = pd.DataFrame(records)
-        duplicates = df.duplicated(subset='arxiv_id').sum()
-        if duplicates:
-            df = df.drop_duplicates(subset="arxiv_id")
-        pipeline(df, year)
-        print(f"\tFinish extract features for {year}!\n")
-        # print(dataset.columns)
\ No newline at end of file
+    build_features(corpus, args.years, args.output, args.workers, args.csv)
@@ -1,21 +1,25 @@
+import os
 import pandas as pd
 import glob
+from data_preprocessing import FEATURES_DIR, feature_years, numeric_features, partition_path
 
-# Find all feature files
-feature_files = glob.glob("features_*.csv")
-numeric_feature_files = glob.glob("numeric_features_*.csv")
+# Per-year feature frames: the partitions written by data_preprocessing.py, or the older per-year CSVs
+if os.path.isdir(FEATURES_DIR):
+    feature_frames = [pd.read_pickle(partition_path(FEATURES_DIR, year)) for year in feature_years(FEATURES_DIR)]
+    numeric_feature_frames = [numeric_features(df) for df in feature_frames]
+else:
+    feature_frames = [pd.read_csv(filename) for filename in glob.glob("features_*.csv")]
+    numeric_feature_frames = [pd.read_csv(filename) for filename in glob.glob("numeric_features_*.csv")]
 
 # Create a list to hold the dataframes
 dfs = []
 
 # Load and append feature files
-for filename in feature_files:
-    df = pd.read_csv(filename)
+for df in feature_frames:
     dfs.append(df)
 
 # Load and append numeric feature files
-for filename in numeric_feature_files:
-    df = pd.read_csv(filename)
+for df in numeric_feature_frames:
     # Add a prefix to numeric feature columns to avoid conflicts
     df = df.rename(columns={col: f"num_{col}" for col in df.columns if col != 'id'})
     dfs.append(df)
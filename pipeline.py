@@ -1,84 +1,257 @@
-# from multiprocessing import Pool
-from scraper import ArxivScraper, GoogleScholarScraper, HuggingFaceScraper, SemanticScholarAPI
+from scraper import ArxivScraper, HuggingFaceScraper, SemanticScholarAPI, default_transport
+from scraper.response_cache import ResponseCache
+from scraper.arxiv_bulk import ArxivBulkClient
+from scraper.ggs_pool import BrowserPool
+from scraper.author_cache import AuthorCache
+from progress_store import ProgressStore, PENDING, FAILED
 import json
 from datetime import datetime
-import os
 from pathlib import Path
-import re
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+# Concurrent requests per source. Google Scholar keeps its own single worker:
+# the Selenium stage is slow and CAPTCHA-prone, so it runs beside the HTTP sources
+# instead of setting their pace.
+DEFAULT_SOURCE_WORKERS = {
+    'arxiv': 4,
+    'huggingface': 4,
+    'semantic_scholar': 1,
+    'google_scholar': 1,
+}
+
+
+class _PaperJob:
+    """Tracks the per-source results of one paper until all of them are in."""
+
+    def __init__(self, paper_id: str, sources):
+        self.paper_id = paper_id
+        self.remaining = set(sources)
+        self.results = {}
+        self.futures = {}
+        self.failed_source = None
+        self.finished = False
+
 
 class ScraperPipeline:
-    def __init__(self, output_basedir: str = 'data', num_workers: int = 4):
+    def __init__(self, output_basedir: str = 'data', num_workers: int = 4, source_workers: dict = None,
+                 max_pending: int = 32, http_cache: bool = True, offline: bool = False,
+                 bulk_arxiv: bool = False, ggs_max_uses: int = 50, ggs_author_fetch: str = 'browser',
+                 author_max_age_days: float = 30, author_snapshot_year: int = None):
+        """
+        Args:
+            output_basedir (str): Directory for the per-paper JSON files and progress files.
+            num_workers (int): Concurrent requests for the arXiv and Hugging Face sources.
+            source_workers (dict): Per-source overrides of DEFAULT_SOURCE_WORKERS.
+            max_pending (int): Papers in flight at once. Bounds how far the HTTP sources
+                run ahead of Google Scholar.
+            http_cache (bool): Keep arXiv / Hugging Face responses in <output_basedir>/http_cache.db
+                so re-runs and backfills only revalidate pages instead of downloading them again.
+            offline (bool): Replay cached responses only, without touching the network.
+            bulk_arxiv (bool): Prefetch arXiv metadata for all papers through the export API
+                (100 ids per request) instead of scraping each abs page.
+            ggs_max_uses (int): Papers per Google Scholar browser session before it is restarted.
+            ggs_author_fetch (str): 'browser' (default) opens one tab per author; 'http' fetches author
+                profiles concurrently with the browser's cookies, falling back to a tab per profile.
+            author_max_age_days (float): Refetch cached Google Scholar author stats older than this.
+            author_snapshot_year (int): Pin author stats to this year's snapshot in the cache, so
+                re-running a historical year reuses the numbers recorded the first time.
+        """
         self.output_basedir = output_basedir
         Path(self.output_basedir).mkdir(parents=True, exist_ok=True)
-        self.num_workers = num_workers # useless for now
+        self.num_workers = num_workers
+        self.source_workers = {**DEFAULT_SOURCE_WORKERS, 'arxiv': num_workers, 'huggingface': num_workers,
+                               **(source_workers or {})}
+        self.max_pending = max_pending
+        if http_cache or offline:
+            default_transport.cache = ResponseCache(self.output_basedir + '/http_cache.db', offline=offline)
         self.arxiv_scraper = ArxivScraper()
+        self.bulk_arxiv = bulk_arxiv
+        self.arxiv_bulk = ArxivBulkClient()
+        self._arxiv_metadata = {}
+        self._ss_records = {}
         self.hf_scraper = HuggingFaceScraper()
         self.ss_scraper = SemanticScholarAPI()
-        self.processed_file = self.output_basedir + f'/processed.json'
-        self.processing_file = self.output_basedir + f'/processing.json'
-
-        existing_ids = []
-        for filename in os.listdir(self.output_basedir):
-            if filename.endswith('.json'):
-                paper_id = re.match(r'(\d{4}\.\d{5})\.json', filename)
-                if paper_id:
-                    existing_ids.append(paper_id.group(1))
-        with open(self.processed_file, 'w', encoding='utf-8') as id_file:
-            json.dump({'arxiv_id': existing_ids,
-                       'timestamp': datetime.now().isoformat()}, 
-                      id_file, ensure_ascii=False, indent=4)
-        self.existing_ids = existing_ids
+        # Author stats shared across papers and runs, see scraper/author_cache.py
+        self.author_cache = AuthorCache(self.output_basedir + '/author_cache.db', author_max_age_days,
+                                        author_snapshot_year)
+        # Warm Chrome sessions, one per Google Scholar worker. Please remains headless=False solve CAPTCHA
+        self.ggs_pool = BrowserPool(size=self.source_workers['google_scholar'], max_uses=ggs_max_uses,
+                                    headless=False, profile_root=self.output_basedir + '/ggs_profiles',
+                                    scraper_options={'author_fetch': ggs_author_fetch,
+                                                     'author_cache': self.author_cache})
+        # pending/done/failed per paper id, see progress_store.py
+        self.progress = ProgressStore(self.output_basedir + '/progress.db')
+        if self.progress.created:
+            self.progress.import_legacy(self.output_basedir)
 
     def default_converter(self, o):
         if isinstance(o, datetime):
             return o.isoformat()
         raise TypeError(f"Type {type(o)} not serializable")
 
-    def get_paper_details(self, paper_id: str) -> dict[str, any]:
+    # --- Per-source fetchers: each returns a dict, or None if the paper should be dropped ---
+
+    def _fetch_arxiv(self, paper_id: str):
+        paper = self._arxiv_metadata.pop(paper_id, None)
+        if paper is not None:
+            print(f"Fetching paper id {paper_id}'s keywords and page count from arXiv...")
+            paper.update(self.arxiv_scraper.get_fulltext_details(paper_id))
+            return paper
         print(f"Fetching paper id {paper_id} from arXiv...")
-        paper = self.arxiv_scraper.get_paper_details(paper_id)
-        
-        print("Fetching paper's Hugging Face profile...")
-        hf_res = self.hf_scraper.get_paper_details(paper_id)
+        return self.arxiv_scraper.get_paper_details(paper_id)
 
+    def prefetch_arxiv_metadata(self, paper_ids) -> None:
+        """Bulk-load arXiv metadata; ids the export API misses fall back to the abs page."""
+        print(f"Prefetching arXiv metadata for {len(paper_ids)} papers from the export API")
+        try:
+            for paper in self.arxiv_bulk.get_papers(paper_ids):
+                self._arxiv_metadata[paper['arxiv_id']] = paper
+        except Exception as e:
+            print(f"Export API prefetch stopped early: {str(e)}")
+        print(f"Prefetched {len(self._arxiv_metadata)} papers")
+
+    def _fetch_huggingface(self, paper_id: str):
+        print(f"Fetching paper {paper_id}'s Hugging Face profile...")
+        hf_res = self.hf_scraper.get_paper_details(paper_id)
         if hf_res is None:
             print(f"HuggingFaceScraper: Failed to fetch paper {paper_id}")
-            return None
+        return hf_res
 
-        paper.update(hf_res)
+    def _fetch_google_scholar(self, paper_id: str):
+        print(f"Fetching paper {paper_id}'s Google Scholar profile...")
+        ggs_res = self.ggs_pool.get_paper_details(paper_id)
+        if ggs_res is None:
+            print(f"GoogleScholarScraper: Failed to fetch paper {paper_id}")
+        return ggs_res
 
-        print("Fetching paper's Google Scholar profile...")
-        ggs_scraper = GoogleScholarScraper(headless=False)  # Please remains headless=False solve CAPTCHA
-        # print(ggs_scraper.have_cookies)
-        if ggs_scraper.have_cookies == True:
-            ggs_scraper.load_cookies_from_file("cookies.pkl")
-        try:
-            ggs_res = ggs_scraper.get_paper_details(paper_id)
-            if ggs_res is None:
-                print(f"GoogleScholarScraper: Failed to fetch paper {paper_id}")
-                return None
-        except Exception as e:
-            print(f"Unexpected error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-        ggs_scraper.close()
-        paper.update(ggs_res)
-        del ggs_scraper
-
-        print("Calling Semantic Scholar API...")
-        ss_res = self.ss_scraper.get_paper_details(paper_id)
+    def _fetch_semantic_scholar(self, paper_id: str):
+        print(f"Calling Semantic Scholar API for paper {paper_id}...")
+        if paper_id in self._ss_records:
+            record = self._ss_records.pop(paper_id)
+            try:
+                # Only the citation / reference pages are left to fetch
+                ss_res = self.ss_scraper.complete(record) if record else None
+            except Exception as e:
+                print(f"SemanticScholarAPI: {str(e)}")
+                ss_res = None
+        else:
+            ss_res = self.ss_scraper.get_paper_details(paper_id)
         if ss_res is None:
             print(f"SemanticScholarAPI: Failed to fetch paper {paper_id}")
-            return None
-        for key, value in ss_res.items():
+        return ss_res
+
+    def prefetch_semantic_scholar(self, paper_ids) -> None:
+        """Paper-level Semantic Scholar fields for all papers, 500 ids per batch request."""
+        print(f"Prefetching Semantic Scholar records for {len(paper_ids)} papers")
+        try:
+            self._ss_records.update(self.ss_scraper.lookup_papers(paper_ids))
+        except Exception as e:
+            # Papers without a record fall back to one request each
+            print(f"Semantic Scholar batch lookup stopped early: {str(e)}")
+        print(f"Prefetched {sum(r is not None for r in self._ss_records.values())} Semantic Scholar records")
+
+    def _source_fetchers(self) -> dict:
+        return {
+            'arxiv': self._fetch_arxiv,
+            'huggingface': self._fetch_huggingface,
+            'google_scholar': self._fetch_google_scholar,
+            'semantic_scholar': self._fetch_semantic_scholar,
+        }
+
+    def _merge(self, paper_id: str, results: dict) -> dict:
+        # Same precedence as the sequential pipeline: arXiv < Hugging Face < Google Scholar,
+        # then Semantic Scholar fields except its authors and citationCount
+        paper = results['arxiv']
+        paper.update(results['huggingface'])
+        paper.update(results['google_scholar'])
+        for key, value in results['semantic_scholar'].items():
             if key != 'authors' and key!= 'citationCount':
                 paper[key] = value
-        
+
         print(f"Finish fetching paper id {paper_id}.")
         for key, value in paper.items():
             print(f"{key}: {value}")
         return paper
 
+    def enrich(self, paper_ids):
+        """
+        Fetch all sources for many papers concurrently, one bounded pool per source.
+
+        Yields:
+            (paper_id, paper, failed_source) in completion order; paper is None and
+            failed_source names the source if one of them failed.
+        """
+        fetchers = self._source_fetchers()
+        pools = {source: ThreadPoolExecutor(max_workers=self.source_workers[source], thread_name_prefix=source)
+                 for source in fetchers}
+        done_jobs = queue.Queue()
+        lock = threading.RLock()
+
+        def on_source_done(job, source, future):
+            try:
+                result = future.result()
+            except CancelledError:
+                return
+            except Exception as e:
+                print(f"Unexpected error from {source} for paper {job.paper_id}: {str(e)}")
+                result = None
+
+            with lock:
+                if job.finished:
+                    return
+                job.remaining.discard(source)
+                if result is None:
+                    # No need to wait for the other sources of a dropped paper
+                    job.failed_source = source
+                    job.finished = True
+                    for other in job.futures.values():
+                        other.cancel()
+                    done_jobs.put(job)
+                else:
+                    job.results[source] = result
+                    if not job.remaining:
+                        job.finished = True
+                        done_jobs.put(job)
+
+        def submit(paper_id):
+            job = _PaperJob(paper_id, fetchers)
+            with lock:
+                for source, fetch in fetchers.items():
+                    job.futures[source] = pools[source].submit(fetch, paper_id)
+            for source, future in list(job.futures.items()):
+                future.add_done_callback(lambda f, job=job, source=source: on_source_done(job, source, f))
+
+        paper_ids = iter(paper_ids)
+        pending = 0
+        try:
+            for paper_id in paper_ids:
+                submit(paper_id)
+                pending += 1
+                if pending >= self.max_pending:
+                    break
+
+            while pending:
+                job = done_jobs.get()
+                pending -= 1
+                next_id = next(paper_ids, None)
+                if next_id is not None:
+                    submit(next_id)
+                    pending += 1
+
+                if job.failed_source is not None:
+                    yield job.paper_id, None, job.failed_source
+                else:
+                    yield job.paper_id, self._merge(job.paper_id, job.results), None
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def get_paper_details(self, paper_id: str) -> dict[str, any]:
+        for _, paper, _ in self.enrich([paper_id]):
+            return paper
+
     def __call__(self, arxiv_id: str = None, category: str = None,  year: int = None, max_results: int = 100):
         if arxiv_id:
             paper = self.get_paper_details(arxiv_id)
@@ -87,72 +260,63 @@ class ScraperPipeline:
                 return None
             with open(self.output_basedir+f'/{arxiv_id}.json', 'w', encoding='utf-8') as file:
                 json.dump(paper, file, ensure_ascii=False, indent=4, default=self.default_converter)
+            self.progress.mark_done(arxiv_id)
             return paper
 
-        if os.path.exists(self.processing_file):
-            print(f"Resuming from {self.processing_file}")
-            with open(self.processing_file, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                paper_ids = data.get('arxiv_id', [])
+        paper_ids = self.progress.ids(PENDING, FAILED)
+        if paper_ids:
+            print(f"Resuming {len(paper_ids)} pending/failed papers from {self.progress.db_path}")
         else:
             print("Starting search for paper IDs from Arxiv")
-            paper_ids = self.arxiv_scraper.search_by_category_year(category, year, max_results=max_results)
-            with open(self.processing_file, 'w', encoding='utf-8') as file:
-                json.dump({'arxiv_id':paper_ids, 
-                           'timestamp': datetime.now().isoformat()}, 
-                          file, ensure_ascii=False, indent=4)
-            print(f"Found {len(paper_ids)} paper IDs from Arxiv")
+            found_ids = self.arxiv_scraper.search_by_category_year(category, year, max_results=max_results)
+            print(f"Found {len(found_ids)} paper IDs from Arxiv")
+            if not found_ids:
+                print("No paper IDs to process. Exiting.")
+                return
+            # Ids that are already done stay done
+            self.progress.add_pending(found_ids)
+            paper_ids = self.progress.ids(PENDING)
 
-        if not paper_ids:
-            print("No paper IDs to process. Exiting.")
-            os.remove(self.processing_file)
-            return
-        
-        paper_ids = list(set(paper_ids) - set(self.existing_ids))
-        
         if not paper_ids:
             print("All paper IDs have been processed. Try increase max_results.")
-            os.remove(self.processing_file)
             return
         print(f"Processing {len(paper_ids)} unprocessed paper IDs")
+        if self.bulk_arxiv:
+            self.prefetch_arxiv_metadata(paper_ids)
+        self.prefetch_semantic_scholar(paper_ids)
 
-        for paper_id in paper_ids:
-            # Loi: I have tried to use multiprocessing 
-            #      but it seems that google captcha cannot be handled well in multiple processes :(
-            # with Pool(processes=self.num_workers) as pool:
-            #     enriched_papers = pool.map(self.enrich, batch)
-
-            print(f"Processing paper ID: {paper_id}")
-            paper = self.get_paper_details(paper_id)
+        # Loi: I have tried to use multiprocessing 
+        #      but it seems that google captcha cannot be handled well in multiple processes :(
+        # Sources now run in per-source thread pools instead, with Google Scholar in its own
+        # single worker, and each paper is committed once all of its sources are in.
+        for paper_id, paper, failed_source in self.enrich(paper_ids):
             if paper is None:
-                # print(f"Failed to fetch paper {paper_id}")
+                self.progress.mark_failed(paper_id, f"{failed_source} returned no result")
                 continue
 
-            processing = []
-            with open(self.processing_file, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                processing = data['arxiv_id']
-            processing.remove(paper_id)
-            if processing is None:
-                os.remove(self.processing_file)
-            else:
-                with open(self.processing_file, 'w', encoding='utf-8') as file:
-                    json.dump({'arxiv_id':processing, 
-                            'timestamp': datetime.now().isoformat()}, 
-                            file, ensure_ascii=False, indent=4)
-
-            self.existing_ids.append(paper_id)
-            with open(self.processed_file, 'w', encoding='utf-8') as id_file:
-                json.dump({'arxiv_id': self.existing_ids,
-                           'timestamp': datetime.now().isoformat()}, 
-                            id_file, ensure_ascii=False, indent=4)
-
+            # Write the paper before marking it done: a crash in between only means it is fetched again
             with open(self.output_basedir+f'/{paper_id}.json', 'w', encoding='utf-8') as file:
                 json.dump(paper, file, ensure_ascii=False, indent=4, default=self.default_converter)
+            self.progress.mark_done(paper_id)
+
+        print(self.progress.summary())
+        for host, stats in default_transport.stats().items():
+            print(f"\t{host}: {stats}")
+        print(f"\tgoogle_scholar browsers: {self.ggs_pool.metrics()}")
+        print(f"\tgoogle_scholar authors: {self.author_cache.stats()}")
+
+    def close(self):
+        """Quit the Google Scholar browsers and close the progress store."""
+        self.ggs_pool.close()
+        self.author_cache.close()
+        self.progress.close()
 
 if __name__ == '__main__':
     pipeline = ScraperPipeline()
     category = "cs" 
     year = 2017  
-    pipeline(category=category, year=year, max_results=1250)
+    try:
+        pipeline(category=category, year=year, max_results=1250)
+    finally:
+        pipeline.close()
     # pipeline(arxiv_id="2002.09132")
\ No newline at end of file
@@ -0,0 +1,133 @@
+import sqlite3
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ProgressStore:
+    """
+    Crash-safe scraping progress: one SQLite row per paper id with its status
+    (pending / done / failed). Every status change is a single-row write, so
+    resuming reads the pending ids straight from the table instead of re-listing
+    the output directory or rewriting whole JSON files.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.created = not os.path.exists(db_path)
+        self.conn = sqlite3.connect(db_path)
+        # WAL + NORMAL: each commit is an append to the log, and survives a crash of the scraper
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS papers (
+                arxiv_id   TEXT PRIMARY KEY,
+                status     TEXT NOT NULL,
+                attempts   INTEGER NOT NULL DEFAULT 0,
+                error      TEXT,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS papers_status ON papers(status)')
+        self.conn.commit()
+
+    def add_pending(self, paper_ids) -> int:
+        """Queue new ids. Ids already known (in any status) are left untouched."""
+        now = datetime.now().isoformat()
+        with self.conn:
+            cursor = self.conn.executemany(
+                'INSERT OR IGNORE INTO papers (arxiv_id, status, updated_at) VALUES (?, ?, ?)',
+                [(paper_id, PENDING, now) for paper_id in paper_ids],
+            )
+        return cursor.rowcount
+
+    def _set_status(self, paper_id: str, status: str, error: str = None) -> None:
+        with self.conn:
+            self.conn.execute(
+                '''INSERT INTO papers (arxiv_id, status, attempts, error, updated_at) VALUES (?, ?, 1, ?, ?)
+                   ON CONFLICT(arxiv_id) DO UPDATE SET
+                       status = excluded.status, attempts = attempts + 1,
+                       error = excluded.error, updated_at = excluded.updated_at''',
+                (paper_id, status, error, datetime.now().isoformat()),
+            )
+
+    def mark_done(self, paper_id: str) -> None:
+        self._set_status(paper_id, DONE)
+
+    def mark_failed(self, paper_id: str, error: str = None) -> None:
+        self._set_status(paper_id, FAILED, error)
+
+    def ids(self, *statuses) -> list:
+        placeholders = ','.join('?' * len(statuses))
+        rows = self.conn.execute(
+            f'SELECT arxiv_id FROM papers WHERE status IN ({placeholders}) ORDER BY arxiv_id', statuses
+        )
+        return [row[0] for row in rows]
+
+    def is_done(self, paper_id: str) -> bool:
+        row = self.conn.execute('SELECT status FROM papers WHERE arxiv_id = ?', (paper_id,)).fetchone()
+        return row is not None and row[0] == DONE
+
+    def counts(self) -> dict:
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        for status, n in self.conn.execute('SELECT status, COUNT(*) FROM papers GROUP BY status'):
+            counts[status] = n
+        return counts
+
+    def summary(self, max_failures: int = 10) -> str:
+        counts = self.counts()
+        total = sum(counts.values())
+        lines = [f"Progress ({self.db_path}): {counts[DONE]}/{total} done, "
+                 f"{counts[PENDING]} pending, {counts[FAILED]} failed"]
+        failures = self.conn.execute(
+            'SELECT arxiv_id, attempts, error, updated_at FROM papers WHERE status = ? '
+            'ORDER BY updated_at DESC LIMIT ?', (FAILED, max_failures),
+        ).fetchall()
+        for paper_id, attempts, error, updated_at in failures:
+            lines.append(f"\t{paper_id}: {attempts} attempt(s), last {updated_at}: {error}")
+        return '\n'.join(lines)
+
+    def import_legacy(self, output_basedir: str) -> None:
+        """
+        One-time migration from the old layout: per-paper JSON files count as done,
+        ids left in processing.json as pending.
+        """
+        done_ids = []
+        for filename in os.listdir(output_basedir):
+            paper_id = re.match(r'(\d{4}\.\d{5})\.json', filename)
+            if paper_id:
+                done_ids.append(paper_id.group(1))
+
+        processing_file = os.path.join(output_basedir, 'processing.json')
+        pending_ids = []
+        if os.path.exists(processing_file):
+            with open(processing_file, 'r', encoding='utf-8') as file:
+                pending_ids = json.load(file).get('arxiv_id', [])
+
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO papers (arxiv_id, status, updated_at) VALUES (?, ?, ?)',
+                [(paper_id, DONE, now) for paper_id in done_ids],
+            )
+        self.add_pending(pending_ids)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+if __name__ == '__main__':
+    # Usage: python progress_store.py [data/progress.db]
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'data/progress.db'
+    if not os.path.exists(db_path):
+        print(f"No progress store at {db_path}")
+        sys.exit(1)
+    store = ProgressStore(db_path)
+    print(store.summary())
+    store.close()
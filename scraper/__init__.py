@@ -1,4 +1,6 @@
 from .arxiv_scraper import ArxivScraper
 from .ggs_scraper import GoogleScholarScraper
 from .hf_scraper import HuggingFaceScraper
-from .ss_scraper import SemanticScholarAPI
\ No newline at end of file
+from .ss_scraper import SemanticScholarAPI
+from .transport import HttpTransport, default_transport
+from .ggs_pool import BrowserPool
@@ -0,0 +1,221 @@
+"""
+Bulk arXiv metadata through the export API (Atom) and OAI-PMH (arXivRaw) instead of
+one abs page per paper.
+
+Both feeds are parsed incrementally with iterparse, each entry is cleared once it
+is mapped, so memory stays flat however large the response. Records use the same
+dict schema as ArxivScraper.get_paper_details. Categories are arXiv codes
+('cs.LG') rather than the abs page labels ('Machine Learning (cs.LG)'); both
+reduce to the same value through normalize_category in data_preprocessing.py.
+keywords and num_pages are not in the metadata and are left as None.
+
+The parsers take any file-like object, so they can be checked against recorded
+responses without network access:
+    python -m scraper.arxiv_bulk --atom scraper/fixtures/arxiv_atom.xml
+    python -m scraper.arxiv_bulk --oai scraper/fixtures/arxiv_oai_raw.xml
+"""
+import argparse
+import email.utils
+import logging
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, Generator, Iterable, Iterator, List, Optional
+
+from .transport import HttpTransport, default_transport
+
+logger = logging.getLogger("arxiv_bulk")
+
+EXPORT_API_URL = "https://export.arxiv.org/api/query"
+OAI_URL = "https://oaipmh.arxiv.org/oai"
+# Ids per export API request; id_list goes into the query string
+ID_BATCH_SIZE = 100
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+ARXIV = '{http://arxiv.org/schemas/atom}'
+OAI = '{http://www.openarchives.org/OAI/2.0/}'
+RAW = '{http://arxiv.org/OAI/arXivRaw/}'
+
+
+def _clean(text: Optional[str]) -> str:
+    return ' '.join((text or '').split())
+
+
+def _day(value: datetime) -> datetime:
+    # The abs page only has day resolution; keep the same naive midnight datetimes
+    return datetime(value.year, value.month, value.day)
+
+
+def _paper(paper_id, title, authors, abstract, published, revised, num_revisions, primary, categories) -> Dict:
+    return {
+        "arxiv_id": paper_id,
+        "title": title,
+        "authors": authors,
+        "abstract": abstract,
+        "published_date": published,
+        "last_revised_date": revised,
+        "num_revisions": num_revisions,
+        "pdf_url": f"https://arxiv.org/pdf/{paper_id}.pdf",
+        "primary_category": primary,
+        "categories": categories,
+        "keywords": None,
+        "num_pages": None,
+    }
+
+
+def _atom_entry(entry: ET.Element) -> Optional[Dict]:
+    match = re.search(r'/abs/(.+?)(?:v(\d+))?$', entry.findtext(f'{ATOM}id', ''))
+    if not match:
+        # Unknown ids come back as an entry pointing at api/errors
+        logger.error(f"Export API error: {_clean(entry.findtext(f'{ATOM}summary'))}")
+        return None
+    paper_id, version = match.group(1), int(match.group(2) or 1)
+    primary = entry.find(f'{ARXIV}primary_category')
+    return _paper(
+        paper_id,
+        _clean(entry.findtext(f'{ATOM}title')),
+        [_clean(author.findtext(f'{ATOM}name')) for author in entry.findall(f'{ATOM}author')],
+        _clean(entry.findtext(f'{ATOM}summary')),
+        _day(datetime.fromisoformat(entry.findtext(f'{ATOM}published').replace('Z', '+00:00'))),
+        _day(datetime.fromisoformat(entry.findtext(f'{ATOM}updated').replace('Z', '+00:00'))),
+        version - 1,
+        primary.get('term') if primary is not None else None,
+        [category.get('term') for category in entry.findall(f'{ATOM}category')],
+    )
+
+
+def parse_atom(source) -> Iterator[Dict]:
+    """Stream papers out of an export API (Atom) response."""
+    for _, elem in ET.iterparse(source, events=('end',)):
+        if elem.tag == f'{ATOM}entry':
+            paper = _atom_entry(elem)
+            elem.clear()
+            if paper is not None:
+                yield paper
+
+
+def split_authors(authors: str) -> List[str]:
+    """'A. One, B. Two (Univ. X) and C. Three' -> ['A. One', 'B. Two', 'C. Three']"""
+    authors = re.sub(r'\([^)]*\)', '', _clean(authors))
+    return [name.strip() for name in re.split(r',\s*(?:and\s+)?|\s+and\s+', authors) if name.strip()]
+
+
+def _raw_record(raw: ET.Element) -> Dict:
+    versions = [email.utils.parsedate_to_datetime(v.findtext(f'{RAW}date'))
+                for v in raw.findall(f'{RAW}version')]
+    categories = raw.findtext(f'{RAW}categories', '').split()
+    return _paper(
+        raw.findtext(f'{RAW}id'),
+        _clean(raw.findtext(f'{RAW}title')),
+        split_authors(raw.findtext(f'{RAW}authors', '')),
+        _clean(raw.findtext(f'{RAW}abstract')),
+        _day(versions[0]) if versions else None,
+        _day(versions[-1]) if versions else None,
+        max(0, len(versions) - 1),
+        categories[0] if categories else None,
+        categories,
+    )
+
+
+def parse_oai(source) -> Generator[Dict, None, Optional[str]]:
+    """
+    Stream papers out of an OAI-PMH ListRecords (metadataPrefix=arXivRaw) response.
+    Deleted records are skipped. Returns the resumptionToken (None on the last page),
+    so callers can write `token = yield from parse_oai(stream)`.
+    """
+    token = None
+    for _, elem in ET.iterparse(source, events=('end',)):
+        if elem.tag == f'{OAI}record':
+            header = elem.find(f'{OAI}header')
+            raw = elem.find(f'{OAI}metadata/{RAW}arXivRaw')
+            if header is not None and header.get('status') != 'deleted' and raw is not None:
+                yield _raw_record(raw)
+            elem.clear()
+        elif elem.tag == f'{OAI}resumptionToken':
+            token = (elem.text or '').strip() or None
+        elif elem.tag == f'{OAI}error':
+            # noRecordsMatch is a normal empty result
+            if elem.get('code') != 'noRecordsMatch':
+                raise IOError(f"OAI-PMH error {elem.get('code')}: {_clean(elem.text)}")
+    return token
+
+
+class ArxivBulkClient:
+    def __init__(self, transport: HttpTransport = None):
+        self.transport = transport or default_transport
+
+    def _stream(self, url: str, params: Dict):
+        response = self.transport.get(url, params=params, stream=True)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return response
+
+    def get_papers(self, paper_ids: Iterable[str], batch_size: int = ID_BATCH_SIZE) -> Iterator[Dict]:
+        """
+        Metadata for many ids, batch_size ids per export API request.
+        Ids the API does not know are skipped.
+        """
+        paper_ids = list(paper_ids)
+        for start in range(0, len(paper_ids), batch_size):
+            batch = paper_ids[start:start + batch_size]
+            logger.info(f"Export API: fetching {len(batch)} papers ({start + len(batch)}/{len(paper_ids)})")
+            response = self._stream(EXPORT_API_URL, {'id_list': ','.join(batch), 'max_results': len(batch)})
+            with response:
+                yield from parse_atom(response.raw)
+
+    def harvest(self, set_spec: str = 'cs', from_date: str = None, until_date: str = None,
+                categories: List[str] = None, year: int = None) -> Iterator[Dict]:
+        """
+        Harvest every record of an OAI-PMH set, following resumption tokens.
+
+        Args:
+            set_spec (str): OAI set, e.g. 'cs' or 'physics:hep-th'.
+            from_date, until_date (str): 'YYYY-MM-DD' bounds on the record datestamp (last metadata change).
+            categories (list): Keep only papers whose primary category is in this list.
+            year (int): Keep only papers first submitted in this year.
+        """
+        params = {'verb': 'ListRecords', 'metadataPrefix': 'arXivRaw', 'set': set_spec}
+        if from_date:
+            params['from'] = from_date
+        if until_date:
+            params['until'] = until_date
+
+        while params:
+            response = self._stream(OAI_URL, params)
+            with response:
+                token = yield from self._filtered(parse_oai(response.raw), categories, year)
+            params = {'verb': 'ListRecords', 'resumptionToken': token} if token else None
+
+    @staticmethod
+    def _filtered(records: Generator, categories: Optional[List[str]], year: Optional[int]):
+        # Written out instead of a generator expression so parse_oai's return value (the token) comes through
+        while True:
+            try:
+                paper = next(records)
+            except StopIteration as stop:
+                return stop.value
+            if categories is not None and paper['primary_category'] not in categories:
+                continue
+            if year is not None and (paper['published_date'] is None or paper['published_date'].year != year):
+                continue
+            yield paper
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--atom', help='Parse a recorded export API response')
+    group.add_argument('--oai', help='Parse a recorded OAI-PMH ListRecords response')
+    args = parser.parse_args()
+
+    if args.atom:
+        for paper in parse_atom(args.atom):
+            print(paper)
+    else:
+        records = parse_oai(args.oai)
+        while True:
+            try:
+                print(next(records))
+            except StopIteration as stop:
+                print(f"resumptionToken: {stop.value}")
+                break
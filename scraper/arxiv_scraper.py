@@ -1,11 +1,10 @@
-import requests
 from bs4 import BeautifulSoup, NavigableString
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 import re
-import io
-from PyPDF2 import PdfReader
+from .transport import HttpTransport, default_transport
+from .pdf_pages import probe_num_pages, probe_num_pages_many
 
 logger = logging.getLogger("arxiv_crawler")
 logging.basicConfig(
@@ -16,7 +15,8 @@ logging.basicConfig(
 )
 
 class ArxivScraper:
-    def __init__(self):
+    def __init__(self, transport: HttpTransport = None):
+        self.transport = transport or default_transport
         self.base_url = "https://arxiv.org/abs/"
         self.search_url = "https://arxiv.org/search/"
         self.headers = {
@@ -36,7 +36,7 @@ class ArxivScraper:
         """
         # try:
         url = f"{self.base_url}{paper_id}"
-        response = requests.get(url, headers=self.headers, timeout=30)
+        response = self.transport.get(url, headers=self.headers)
         
         if response.status_code != 200:
             logger.error(f"Failed to fetch paper {paper_id}. Status code: {response.status_code}")
@@ -78,6 +78,13 @@ class ArxivScraper:
         #     logger.error(f"Error fetching paper {paper_id}: {str(e)}")
         #     return None
 
+    def get_fulltext_details(self, paper_id: str) -> Dict:
+        """The fields that are not in arXiv's metadata feeds (see arxiv_bulk.py)."""
+        return {
+            "keywords": self._get_paper_keywords(paper_id),
+            "num_pages": self._get_paper_num_pages(paper_id),
+        }
+
     def _get_title(self, soup: BeautifulSoup) -> str:
         """Extract paper title from the soup object."""
         title_element = soup.find('h1', {'class': 'title mathjax'})
@@ -175,7 +182,7 @@ class ArxivScraper:
     def _get_paper_keywords(self, paper_id: str):
         url = f"https://arxiv.org/html/{paper_id}"
         try:
-            res = requests.get(url)
+            res = self.transport.get(url, headers=self.headers)
             res.raise_for_status()
         except Exception:
             return None  # Không in lỗi ra màn hình
@@ -214,20 +221,20 @@ class ArxivScraper:
     def _get_paper_num_pages(self, paper_id: str) -> int:
         """
         Trích xuất số trang của paper từ file PDF arXiv.
+        Chỉ đọc trailer / xref / page tree bằng HTTP range request, xem scraper/pdf_pages.py.
         Args:
             paper_id (str): Mã arXiv, ví dụ '2510.14539v1'
         Returns:
             int: Số trang (hoặc None nếu không lấy được)
         """
         pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
-        try:
-            response = requests.get(pdf_url, timeout=30)
-            response.raise_for_status()
-            with io.BytesIO(response.content) as pdf_file:
-                reader = PdfReader(pdf_file)
-                return len(reader.pages)
-        except Exception as e:
-            return None
+        return probe_num_pages(pdf_url, self.transport, self.headers)['num_pages']
+
+    def get_num_pages_many(self, paper_ids: List[str], max_workers: int = 8) -> Dict[str, Optional[int]]:
+        """Page counts for many papers at once, probed concurrently."""
+        urls = {paper_id: f"https://arxiv.org/pdf/{paper_id}.pdf" for paper_id in paper_ids}
+        probes = probe_num_pages_many(list(urls.values()), self.transport, max_workers)
+        return {paper_id: probes[url]['num_pages'] for paper_id, url in urls.items()}
 
     def search_by_category_year(self, category: str, year:int = 2020, max_results: int = 10) -> List[Dict]:
         """
@@ -254,7 +261,7 @@ class ArxivScraper:
             logger.debug(f"Fetching URL: {search_url}")
             
             try:
-                response = requests.get(search_url, headers=self.headers, timeout=30)
+                response = self.transport.get(search_url, headers=self.headers)
                 if response.status_code != 200:
                     logger.error(f"Search failed. Status code: {response.status_code}")
                     break
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+STAT_COLUMNS = ['citations_all', 'citations_recent', 'h_index_all', 'h_index_recent',
+                'i10_index_all', 'i10_index_recent']
+# Snapshot key of the rolling (non year-pinned) entry
+LIVE = 0
+
+
+def author_key(profile_url: str) -> Optional[str]:
+    """Normalized cache key of a Scholar profile URL: its user= parameter."""
+    if not profile_url:
+        return None
+    users = parse_qs(urlsplit(profile_url).query).get('user')
+    return users[0] if users else None
+
+
+class AuthorCache:
+    """
+    Google Scholar author statistics shared across papers and runs, keyed by the
+    profile's user= id.
+
+    Without a snapshot year, entries older than max_age_days are refetched. With
+    snapshot_year set, reads and writes go to that year's snapshot instead, which
+    never expires: a historical run keeps seeing the numbers it first recorded.
+    """
+
+    def __init__(self, db_path: str, max_age_days: float = 30, snapshot_year: int = None):
+        self.db_path = db_path
+        self.max_age = max_age_days * 24 * 3600
+        self.snapshot = snapshot_year or LIVE
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS authors (
+                user       TEXT NOT NULL,
+                snapshot   INTEGER NOT NULL,
+                name       TEXT,
+                {', '.join(f'{col} INTEGER' for col in STAT_COLUMNS)},
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (user, snapshot)
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, profile_url: str) -> Optional[Dict]:
+        """Cached stats for a profile, or None if missing or stale."""
+        user = author_key(profile_url)
+        if user is None:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                f'SELECT {", ".join(STAT_COLUMNS)}, fetched_at FROM authors WHERE user = ? AND snapshot = ?',
+                (user, self.snapshot),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if self.snapshot == LIVE and time.time() - row[-1] > self.max_age:
+                self.stale += 1
+                return None
+            self.hits += 1
+        return dict(zip(STAT_COLUMNS, row[:-1]))
+
+    def put(self, profile_url: str, stats: Dict) -> None:
+        """Store freshly scraped stats; incomplete results (errors, timeouts) are not cached."""
+        user = author_key(profile_url)
+        if user is None or any(stats.get(col) is None for col in STAT_COLUMNS):
+            return
+        with self._lock, self.conn:
+            self.conn.execute(
+                f'INSERT OR REPLACE INTO authors (user, snapshot, name, {", ".join(STAT_COLUMNS)}, fetched_at) '
+                f'VALUES (?, ?, ?, {", ".join("?" * len(STAT_COLUMNS))}, ?)',
+                (user, self.snapshot, stats.get('name'), *[stats[col] for col in STAT_COLUMNS], time.time()),
+            )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            entries, = self.conn.execute('SELECT COUNT(*) FROM authors WHERE snapshot = ?',
+                                         (self.snapshot,)).fetchone()
+            return {
+                'snapshot': self.snapshot or 'live',
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'hit_rate': self.hits / lookups if lookups else None,
+            }
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+if __name__ == '__main__':
+    # Usage: python -m scraper.author_cache [data/author_cache.db]
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'data/author_cache.db'
+    if not os.path.exists(db_path):
+        print(f"No author cache at {db_path}")
+        sys.exit(1)
+    cache = AuthorCache(db_path)
+    for snapshot, n, oldest, newest in cache.conn.execute(
+            'SELECT snapshot, COUNT(*), MIN(fetched_at), MAX(fetched_at) FROM authors GROUP BY snapshot'):
+        print(f"{snapshot or 'live'}: {n} authors, fetched {time.ctime(oldest)} .. {time.ctime(newest)}")
+    cache.close()
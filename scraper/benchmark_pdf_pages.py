@@ -0,0 +1,111 @@
+"""
+Benchmark the range-request page counter against full PDF downloads on a local corpus.
+
+Serves a directory of PDFs over a local HTTP server with Range support, then counts
+pages for every file twice: full download + PdfReader (the old _get_paper_num_pages)
+and probe_num_pages. Prints bytes transferred, requests and wall time for each as JSON.
+
+Usage (from the repository root):
+    python -m scraper.benchmark_pdf_pages path/to/pdfs --workers 8
+"""
+import argparse
+import io
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from PyPDF2 import PdfReader
+
+from .pdf_pages import probe_num_pages_many
+from .transport import HttpTransport
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler plus single-range `Range: bytes=` support."""
+
+    def send_head(self):
+        match = re.match(r'bytes=(\d*)-(\d*)$', self.headers.get('Range', ''))
+        path = self.translate_path(self.path)
+        if not match or not os.path.isfile(path):
+            return super().send_head()
+
+        size = os.path.getsize(path)
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last) if last else size - 1, size - 1)
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        with open(path, 'rb') as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        self.send_response(206)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def full_download_pages(url: str, transport: HttpTransport):
+    response = transport.get(url)
+    response.raise_for_status()
+    with io.BytesIO(response.content) as pdf_file:
+        return len(PdfReader(pdf_file).pages), len(response.content)
+
+
+def run(corpus_dir: str, workers: int = 8) -> dict:
+    files = sorted(f for f in os.listdir(corpus_dir) if f.lower().endswith('.pdf'))
+    if not files:
+        raise ValueError(f"No PDFs in {corpus_dir}")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(RangeRequestHandler, directory=corpus_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}/'
+    urls = [base + name for name in files]
+    # No response cache and no throttling: measure the transfers themselves
+    transport = HttpTransport(rate_limits={'127.0.0.1': (1e6, 1000)})
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            full = list(executor.map(lambda url: full_download_pages(url, transport), urls))
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        probes = probe_num_pages_many(urls, transport, max_workers=workers)
+        probe_time = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    mismatches = [name for name, url, (pages, _) in zip(files, urls, full) if probes[url]['num_pages'] != pages]
+    full_bytes = sum(size for _, size in full)
+    probe_bytes = sum(p['bytes'] for p in probes.values())
+    return {
+        'files': len(files),
+        'corpus_mb': round(sum(os.path.getsize(os.path.join(corpus_dir, f)) for f in files) / 1024 ** 2, 2),
+        'full_download': {'bytes': full_bytes, 'requests': len(urls), 'seconds': round(full_time, 3)},
+        'range_probe': {
+            'bytes': probe_bytes,
+            'requests': sum(p['requests'] for p in probes.values()),
+            'seconds': round(probe_time, 3),
+            'fallbacks': sum(p['method'] == 'full' for p in probes.values()),
+        },
+        'bytes_ratio': round(probe_bytes / full_bytes, 4) if full_bytes else None,
+        'mismatches': mismatches,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus_dir', help='Directory with sample PDFs')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(run(args.corpus_dir, args.workers), indent=4))
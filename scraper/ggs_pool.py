@@ -0,0 +1,224 @@
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from .ggs_scraper import GoogleScholarScraper, CaptchaDetected, GOOGLE_SCHOLAR_URL
+
+logger = logging.getLogger("google_scholar")
+
+
+class EmptyResult(RuntimeError):
+    """A leased scraper returned nothing: GoogleScholarScraper swallows driver errors and returns None."""
+
+
+class _Session:
+    def __init__(self, session_id: int, scraper: GoogleScholarScraper):
+        self.session_id = session_id
+        self.scraper = scraper
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class BrowserPool:
+    """
+    Long-lived pool of warm Google Scholar browser sessions.
+
+    Each slot keeps its own Chrome profile directory and cookie jar under
+    profile_root/session-<i>, so a session that passed a CAPTCHA keeps its cookies.
+    Sessions are leased one paper at a time and recycled (browser quit, a fresh
+    one started on the next lease) after max_uses papers or when a lease fails,
+    including a get_paper_details that comes back empty.
+    """
+
+    def __init__(self, size: int = 1, max_uses: int = 50, headless: bool = False,
+                 profile_root: str = 'data/ggs_profiles', base_url: str = GOOGLE_SCHOLAR_URL,
+                 seed_cookies: str = 'cookies.pkl', interactive: bool = True,
+                 scraper_options: Dict = None, factory: Callable[..., GoogleScholarScraper] = None):
+        """
+        Args:
+            size (int): Number of browser sessions.
+            max_uses (int): Papers served by one session before it is restarted.
+            headless (bool): Passed to GoogleScholarScraper; keep False to solve CAPTCHAs by hand.
+            profile_root (str): Parent directory of the per-session profiles and cookie jars.
+            base_url (str): Google Scholar root, or a local stand-in (ggs_standin.py).
+            seed_cookies (str): Cookie jar copied into a session that has none yet.
+            interactive (bool): Wait for a manual CAPTCHA solve; otherwise the lease fails and the session is recycled.
+            scraper_options (dict): Extra GoogleScholarScraper arguments, e.g. {'author_fetch': 'http'}.
+            factory (callable): Builds a scraper from the same keyword arguments as GoogleScholarScraper.
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.headless = headless
+        self.profile_root = profile_root
+        self.base_url = base_url
+        self.seed_cookies = seed_cookies
+        self.interactive = interactive
+        self.scraper_options = scraper_options or {}
+        self.factory = factory or GoogleScholarScraper
+
+        self._idle = queue.Queue()
+        # Free slot ids: a session is only started when a lease needs one
+        self._free_slots = queue.Queue()
+        for session_id in range(size):
+            self._free_slots.put(session_id)
+        self._lock = threading.Lock()
+        self._alive = {}
+        self._closed = False
+
+        self.counters = Counter()
+        self.lease_wait = 0.0
+        self.startup_time = 0.0
+        self.captcha_events = 0
+
+    def _start_session(self, session_id: int) -> _Session:
+        profile_dir = os.path.join(self.profile_root, f'session-{session_id}')
+        os.makedirs(profile_dir, exist_ok=True)
+        cookies_file = os.path.join(profile_dir, 'cookies.pkl')
+        if not os.path.exists(cookies_file) and self.seed_cookies and os.path.exists(self.seed_cookies):
+            shutil.copyfile(self.seed_cookies, cookies_file)
+
+        start = time.perf_counter()
+        scraper = self.factory(headless=self.headless, profile_dir=profile_dir, cookies_file=cookies_file,
+                               base_url=self.base_url, interactive=self.interactive, **self.scraper_options)
+        try:
+            if scraper.have_cookies:
+                scraper.load_cookies_from_file()
+        except Exception as e:
+            logger.error(f"Session {session_id}: could not load cookies: {str(e)}")
+        elapsed = time.perf_counter() - start
+
+        session = _Session(session_id, scraper)
+        with self._lock:
+            self._alive[session_id] = session
+            self.startup_time += elapsed
+            self.counters['sessions_started'] += 1
+        logger.info(f"Started browser session {session_id} in {elapsed:.1f}s")
+        return session
+
+    def _retire(self, session: _Session, reason: str) -> None:
+        with self._lock:
+            self._alive.pop(session.session_id, None)
+            self.captcha_events += session.scraper.captcha_events
+            self.counters[f'recycled_{reason}'] += 1
+        try:
+            session.scraper.close()
+        except Exception as e:
+            logger.error(f"Session {session.session_id}: error while closing: {str(e)}")
+        self._free_slots.put(session.session_id)
+
+    def warm_up(self) -> None:
+        """Start every session now instead of on first use."""
+        sessions = []
+        while True:
+            try:
+                sessions.append(self._start_session(self._free_slots.get_nowait()))
+            except queue.Empty:
+                break
+        for session in sessions:
+            self._idle.put(session)
+
+    def _acquire(self) -> _Session:
+        start = time.perf_counter()
+        while True:
+            if self._closed:
+                raise RuntimeError("BrowserPool is closed")
+            try:
+                session = self._idle.get_nowait()
+                break
+            except queue.Empty:
+                pass
+            try:
+                session = self._start_session(self._free_slots.get_nowait())
+                break
+            except queue.Empty:
+                pass
+            # Every slot is leased: wait for one to come back (idle or retired)
+            try:
+                session = self._idle.get(timeout=0.5)
+                break
+            except queue.Empty:
+                continue
+        with self._lock:
+            self.lease_wait += time.perf_counter() - start
+            self.counters['leases'] += 1
+        return session
+
+    def _release(self, session: _Session, failed: bool, captcha: bool = False) -> None:
+        session.uses += 1
+        if self._closed:
+            self._retire(session, 'closed')
+        elif captcha:
+            self._retire(session, 'captcha')
+        elif failed:
+            self._retire(session, 'failure')
+        elif session.uses >= self.max_uses:
+            self._retire(session, 'max_uses')
+        else:
+            self._idle.put(session)
+
+    @contextmanager
+    def lease(self):
+        """Borrow a warm scraper; any exception in the block recycles its session."""
+        session = self._acquire()
+        try:
+            yield session.scraper
+        except CaptchaDetected:
+            with self._lock:
+                self.counters['failures'] += 1
+            self._release(session, failed=True, captcha=True)
+            raise
+        except Exception:
+            with self._lock:
+                self.counters['failures'] += 1
+            self._release(session, failed=True)
+            raise
+        else:
+            self._release(session, failed=False)
+
+    def get_paper_details(self, arxiv_id: str, **kwargs) -> Optional[Dict]:
+        """GoogleScholarScraper.get_paper_details on a leased session; None if it failed."""
+        try:
+            with self.lease() as scraper:
+                result = scraper.get_paper_details(arxiv_id, **kwargs)
+                if result is None:
+                    # A dead or logged-out driver looks like this too: recycle the session
+                    raise EmptyResult(f"no result for {arxiv_id}")
+                return result
+        except Exception as e:
+            logger.error(f"Google Scholar lease failed for {arxiv_id}: {str(e)}")
+            return None
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            alive = list(self._alive.values())
+            leases = self.counters['leases']
+            started = self.counters['sessions_started']
+            return {
+                'size': self.size,
+                'alive': len(alive),
+                'idle': self._idle.qsize(),
+                'leased': len(alive) - self._idle.qsize(),
+                'leases': leases,
+                'failures': self.counters['failures'],
+                'sessions_started': started,
+                'recycled': {key[len('recycled_'):]: n for key, n in self.counters.items()
+                             if key.startswith('recycled_')},
+                'captcha_events': self.captcha_events + sum(s.scraper.captcha_events for s in alive),
+                'mean_lease_wait_s': round(self.lease_wait / leases, 3) if leases else None,
+                'mean_startup_s': round(self.startup_time / started, 3) if started else None,
+                'mean_uses_per_session': round(leases / started, 2) if started else None,
+            }
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._retire(self._idle.get_nowait(), 'closed')
+            except queue.Empty:
+                break
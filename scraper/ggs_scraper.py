@@ -9,8 +9,13 @@ import time
 import random
 import re
 import logging
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer
 import os
+from .transport import HttpTransport, default_transport
+from .author_cache import AuthorCache
 
 logger = logging.getLogger("google_scholar")
 logging.basicConfig(
@@ -19,6 +24,36 @@ logging.basicConfig(
     level=logging.DEBUG,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
+
+GOOGLE_SCHOLAR_URL = 'https://scholar.google.com'
+
+# Common text patterns in CAPTCHA or block pages
+CAPTCHA_PATTERNS = [
+    "unusual traffic",
+    "our systems have detected",
+    "sorry, we can't process your request",
+    "to continue, please type the characters below",
+    'id="captcha"',
+    "please show you're not a robot",
+    "/sorry/index",
+    "recaptcha"
+]
+
+# Author profile fetches in flight at once, across every scraper and thread in the
+# process. Keeps the burst of profile requests under Google Scholar's block threshold.
+MAX_CONCURRENT_PROFILE_FETCHES = int(os.environ.get('GGS_MAX_PROFILE_FETCHES', 4))
+_profile_slots = threading.BoundedSemaphore(MAX_CONCURRENT_PROFILE_FETCHES)
+# captcha_events is incremented from the author_fetch='http' worker threads
+_captcha_lock = threading.Lock()
+
+AUTHOR_STAT_KEYS = ['citations_all', 'citations_recent', 'h_index_all', 'h_index_recent',
+                    'i10_index_all', 'i10_index_recent']
+
+
+class CaptchaDetected(Exception):
+    """Raised instead of waiting for a manual solve when the scraper is not interactive."""
+
+
 def extract_citation_data_as_dict(html: str) -> dict:
     """
     Trích xuất năm và số lượng trích dẫn từ mã HTML và trả về dưới dạng
@@ -55,21 +90,58 @@ def extract_citation_data_as_dict(html: str) -> dict:
 
     return citation_dict
 
+def parse_author_stats(html: str):
+    """
+    Citations / h-index / i10-index (all, recent) from a profile page, or None if the
+    page has no stats table (blocked, CAPTCHA, or not a profile). Only the table is parsed.
+    """
+    table = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('table', id='gsc_rsb_st'))
+    cells = table.find_all('td', class_='gsc_rsb_std')
+    if len(cells) < len(AUTHOR_STAT_KEYS):
+        return None
+    try:
+        return {key: int(cell.get_text(strip=True)) for key, cell in zip(AUTHOR_STAT_KEYS, cells)}
+    except ValueError:
+        return None
+
+
 class GoogleScholarScraper:
     """
     Google Scholar scraper using Selenium with anti-detection measures
     """
     
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, profile_dir=None, cookies_file="cookies.pkl",
+                 base_url=GOOGLE_SCHOLAR_URL, interactive=True, author_fetch='browser',
+                 author_workers=4, transport: HttpTransport = None, author_cache: AuthorCache = None):
         """
         Initialize the scraper
         
         Args:
             headless: If True, run browser in headless mode (no visible window)
+            profile_dir: Chrome user data directory, so a session keeps its own profile
+            cookies_file: Cookie jar loaded by load_cookies_from_file and saved after a CAPTCHA
+            base_url: Google Scholar root, or a local stand-in (see ggs_standin.py)
+            interactive: If False, raise CaptchaDetected instead of waiting for a manual solve
+            author_fetch: 'browser' opens each author profile in a tab; 'http' fetches the profiles
+                concurrently over plain HTTP with the browser's cookies and falls back to a tab
+                for any profile that does not come back with a stats table
+            author_workers: Concurrent HTTP profile fetches for one paper (still bounded by
+                MAX_CONCURRENT_PROFILE_FETCHES overall)
+            transport: HTTP transport for author_fetch='http'
+            author_cache: Author stats shared across papers; consulted before any profile is opened
         """
+        self.profile_dir = profile_dir
+        self.cookies_file = cookies_file
+        self.base_url = base_url.rstrip('/')
+        self.interactive = interactive
+        self.captcha_events = 0
+        self.author_fetch = author_fetch
+        self.author_workers = author_workers
+        self.transport = transport or default_transport
+        self.author_cache = author_cache
         self.browser = self._setup_browser(headless)
 
-        if os.path.exists("cookies.pkl"):
+        if os.path.exists(self.cookies_file):
             self.have_cookies = True
         else:
             self.have_cookies = False
@@ -91,6 +163,8 @@ class GoogleScholarScraper:
         
         if headless:
             chrome_options.add_argument('--headless')
+        if self.profile_dir:
+            chrome_options.add_argument(f'--user-data-dir={os.path.abspath(self.profile_dir)}')
         
         browser = webdriver.Chrome(options=chrome_options)
         browser.maximize_window()
@@ -120,38 +194,33 @@ class GoogleScholarScraper:
         """Detect if a Google CAPTCHA or 'unusual traffic' page is shown."""
         html = self.browser.page_source.lower()
 
-        # Common text patterns in CAPTCHA or block pages
-        patterns = [
-            "unusual traffic",
-            "our systems have detected",
-            "sorry, we can't process your request",
-            "to continue, please type the characters below",
-            'id="captcha"',
-            "please show you're not a robot",
-            "/sorry/index",
-            "recaptcha"
-        ]
-
-        if any(p in html for p in patterns):
+        if any(p in html for p in CAPTCHA_PATTERNS):
+            with _captcha_lock:
+                self.captcha_events += 1
             logging.warning("⚠️ Google detected a CAPTCHA!")
+            if not self.interactive:
+                raise CaptchaDetected(self.browser.current_url)
             logging.warning("Please solve it manually in the browser window.")
             
             # Pause until user confirms solving it
             input("Press Enter after solving CAPTCHA...")
-            self.save_cookies_to_file("cookies.pkl")
+            self.save_cookies_to_file(self.cookies_file)
             self.have_cookies = True
             return True
         return False
 
-    def save_cookies_to_file(self, filename="cookies.pkl"):
+    def save_cookies_to_file(self, filename=None):
         import pickle
+        filename = filename or self.cookies_file
         cookies = self.browser.get_cookies()
         with open(filename, "wb") as f:
             pickle.dump(cookies, f)
         # print(f"✅ Cookies đã được lưu vào file {filename}")
 
-    def load_cookies_from_file(self, filename="cookies.pkl", domain="https://scholar.google.com"):
+    def load_cookies_from_file(self, filename=None, domain=None):
         import pickle, time
+        filename = filename or self.cookies_file
+        domain = domain or self.base_url
         with open(filename, "rb") as f:
             cookies = pickle.load(f)
         self.browser.get(domain)
@@ -180,7 +249,7 @@ class GoogleScholarScraper:
             logging.info(f"Searching for paper: {arxiv_id}")
             
             # Navigate to Google Scholar
-            self.browser.get('https://scholar.google.com/')
+            self.browser.get(self.base_url + '/')
             self.human_like_delay(2, 4)
             
             # Check if we hit a CAPTCHA
@@ -326,6 +395,8 @@ class GoogleScholarScraper:
 
             return paper_info
             
+        except CaptchaDetected:
+            raise
         except TimeoutException:
             logging.error(f"Timeout error when searching paper: {str(e)}")
             self.browser.save_screenshot('debug_timeout.png')
@@ -422,6 +493,8 @@ class GoogleScholarScraper:
             
             return author_stats
             
+        except CaptchaDetected:
+            raise
         except TimeoutException:
             if len(self.browser.window_handles) > 1:
                 self.browser.close()
@@ -434,6 +507,74 @@ class GoogleScholarScraper:
                 self.browser.switch_to.window(self.browser.window_handles[0])
             return {'name': author_name, 'error': str(e)}
     
+    def get_author_stats_http(self, author_url, author_name, cookies):
+        """
+        Fetch one author profile over plain HTTP with the browser's cookies.
+
+        Returns:
+            dict: Author statistics, or None if the page had no stats table
+                  (the caller then falls back to a browser tab)
+        """
+        url = urljoin(self.base_url + '/', author_url)
+        try:
+            with _profile_slots:
+                response = self.transport.get(url, cookies=cookies, use_cache=False)
+        except Exception as e:
+            logging.error(f"Error fetching profile {url}: {str(e)}")
+            return None
+        if any(p in response.text.lower() for p in CAPTCHA_PATTERNS):
+            with _captcha_lock:
+                self.captcha_events += 1
+            logging.warning(f"CAPTCHA page for profile {url}, falling back to the browser")
+            return None
+        stats = parse_author_stats(response.text) if response.status_code == 200 else None
+        if stats is None:
+            return None
+        return {'name': author_name, **stats}
+
+    def get_authors_stats(self, author_profiles):
+        """
+        Statistics for every author of a paper, in order. Authors without a profile
+        URL get None stats. Cached authors are not fetched again. With author_fetch='http'
+        the rest are fetched concurrently; otherwise (and for HTTP misses) one browser
+        tab at a time.
+        """
+        stats = {}
+        linked = [idx for idx, profile in enumerate(author_profiles) if profile['url']]
+        if self.author_cache is not None:
+            for idx in linked:
+                cached = self.author_cache.get(author_profiles[idx]['url'])
+                if cached is not None:
+                    stats[idx] = {'name': author_profiles[idx]['name'], **cached}
+            linked = [idx for idx in linked if idx not in stats]
+        if self.author_fetch == 'http' and linked:
+            cookies = {c['name']: c['value'] for c in self.browser.get_cookies()}
+            with ThreadPoolExecutor(max_workers=self.author_workers) as executor:
+                futures = {idx: executor.submit(self.get_author_stats_http, author_profiles[idx]['url'],
+                                                author_profiles[idx]['name'], cookies)
+                           for idx in linked}
+                stats.update({idx: future.result() for idx, future in futures.items()})
+                if self.author_cache is not None:
+                    for idx in linked:
+                        if stats[idx] is not None:
+                            self.author_cache.put(author_profiles[idx]['url'], stats[idx])
+
+        authors = []
+        for idx, author_profile in enumerate(author_profiles):
+            # COMMENT: AN AUTHOR HAS NO 'url' MEANS THAT HE/SHE DOESN'T HAVE A SCHOLAR ACCOUNT.
+            if author_profile['url']:
+                author_stats = stats.get(idx)
+                if author_stats is None:
+                    with _profile_slots:
+                        author_stats = self.get_author_stats(author_profile['url'], author_profile['name'])
+                    if self.author_cache is not None:
+                        self.author_cache.put(author_profile['url'], author_stats)
+                authors.append(author_stats)
+            else:
+                authors.append({'name': author_profile['name'], 'citations_all': None, 'citations_recent': None,
+                                'h_index_all': None, 'h_index_recent': None, 'i10_index_all': None, 'i10_index_recent': None})
+        return authors
+
     def get_paper_details(self, arxiv_id, include_citations_over_time=True):
         """
         Get paper citation and h-index for all authors
@@ -478,25 +619,7 @@ class GoogleScholarScraper:
         results['citationCount'] = paper_info['citationCount']
 
         # Step 3: Get h-index for each author with a profile
-        author_profiles = paper_info.get('author_profiles', [])
-        
-        for idx, author_profile in enumerate(author_profiles):            
-            # COMMENT: AN AUTHOR HAS NO 'url' MEANS THAT HE/SHE DOESN'T HAVE A SCHOLAR ACCOUNT.
-            
-            if author_profile['url']:
-                author_stats = self.get_author_stats(
-                    author_profile['url'], 
-                    author_profile['name']
-                )
-                results['authors'].append(author_stats)
-                
-                # Delay between authors to avoid rate limiting
-                # if idx < len(author_profiles) - 1:  # Don't delay after last author
-                    # self.human_like_delay(3, 6)
-
-            else: 
-                results['authors'].append({'name': author_profile['name'], 'citations_all': None, 'citations_recent': None, 
-                                           'h_index_all': None, 'h_index_recent': None, 'i10_index_all': None, 'i10_index_recent': None})
+        results['authors'] = self.get_authors_stats(paper_info.get('author_profiles', []))
         return results
     
     def close(self):
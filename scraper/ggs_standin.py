@@ -0,0 +1,144 @@
+"""
+Local stand-in for the Google Scholar pages GoogleScholarScraper reads: the search
+box, a result with author links and a "Cited by" link, the citations-per-year
+histogram and author profiles with the gsc_rsb_st stats table. Content is
+deterministic per arXiv id / user id. A fraction of responses can be CAPTCHA pages.
+
+Point a scraper or BrowserPool at it with base_url to exercise the browser code
+paths without touching scholar.google.com:
+    python -m scraper.ggs_standin --port 8765 --captcha-rate 0.05
+"""
+import argparse
+import html
+import random
+import threading
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+CAPTCHA_PAGE = ("<html><body><h1>Our systems have detected unusual traffic from your computer network.</h1>"
+                "<div id=\"captcha\"></div></body></html>")
+
+
+def _rng(key: str) -> random.Random:
+    return random.Random(zlib.crc32(key.encode('utf-8')))
+
+
+def author_ids(arxiv_id: str, num_authors: int = None) -> list:
+    rng = _rng(arxiv_id)
+    n = num_authors or rng.randint(2, 8)
+    # A small shared pool of authors, so the same profiles show up on many papers
+    return [f"AUTH{rng.randint(0, 199):04d}" for _ in range(n)]
+
+
+def author_stats(user: str) -> list:
+    rng = _rng(user)
+    citations = rng.randint(10, 50000)
+    h_index = rng.randint(1, 80)
+    i10 = rng.randint(0, 200)
+    return [citations, citations // 3, h_index, h_index // 2, i10, i10 // 2]
+
+
+def search_page(query: str) -> str:
+    arxiv_id = query.split(':', 1)[-1]
+    rng = _rng(arxiv_id)
+    authors = []
+    for i, user in enumerate(author_ids(arxiv_id)):
+        name = f"Author {user[-4:]}"
+        # Some authors have no Scholar profile
+        authors.append(name if i % 3 == 2 else f'<a href="/citations?user={user}&amp;hl=en">{name}</a>')
+    return f"""<html><body>
+<form action="/scholar"><input name="q" type="text" value="{html.escape(query)}"></form>
+<div class="gs_r"><div class="gs_ri">
+  <h3 class="gs_rt"><a href="https://arxiv.org/abs/{arxiv_id}">Paper {html.escape(arxiv_id)}</a></h3>
+  <div class="gs_fmaa">{', '.join(authors)}</div>
+  <div class="gs_fl"><a href="/scholar?cites={arxiv_id}">Cited by {rng.randint(0, 500)}</a></div>
+</div></div>
+</body></html>"""
+
+
+def cites_page(arxiv_id: str) -> str:
+    rng = _rng('cites' + arxiv_id)
+    bars = ''.join(f'<a class="gs_hist_g_a" data-year="{year}" data-count="{rng.randint(0, 100)}"></a>'
+                   for year in range(2018, 2026))
+    return f'<html><body><div id="gs_md_hist">{bars}</div></body></html>'
+
+
+def profile_page(user: str) -> str:
+    cells = ''.join(f'<td class="gsc_rsb_std">{value}</td>' for value in author_stats(user))
+    return f"""<html><body><div id="gsc_prf_in">Author {user[-4:]}</div>
+<table id="gsc_rsb_st"><tbody><tr>{cells}</tr></tbody></table>
+</body></html>"""
+
+
+class StandinScholar:
+    def __init__(self, port: int = 0, captcha_rate: float = 0.0, latency: float = 0.0, seed: int = 0):
+        self.captcha_rate = captcha_rate
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.hits = Counter()
+        self._lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                standin._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        parts = urlsplit(request.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        with self._lock:
+            self.hits[parts.path] += 1
+            captcha = parts.path != '/' and self.rng.random() < self.captcha_rate
+        if self.latency:
+            threading.Event().wait(self.latency)
+
+        if captcha:
+            status, body = 200, CAPTCHA_PAGE
+        elif parts.path == '/':
+            status, body = 200, search_page('')
+        elif parts.path == '/scholar' and 'cites' in query:
+            status, body = 200, cites_page(query['cites'])
+        elif parts.path == '/scholar':
+            status, body = 200, search_page(query.get('q', ''))
+        elif parts.path == '/citations' and 'user' in query:
+            status, body = 200, profile_page(query['user'])
+        else:
+            status, body = 404, '<html><body>Not found</body></html>'
+
+        data = body.encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'text/html; charset=utf-8')
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    def start(self) -> str:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--captcha-rate', type=float, default=0.0)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    args = parser.parse_args()
+
+    standin = StandinScholar(args.port, args.captcha_rate, args.latency)
+    print(f"Serving the Google Scholar stand-in at {standin.base_url}")
+    standin.server.serve_forever()
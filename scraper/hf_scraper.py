@@ -1,7 +1,7 @@
 from bs4 import BeautifulSoup
 from typing import Optional, Dict
 import logging
-import requests
+from .transport import HttpTransport, default_transport
 
 logger = logging.getLogger("hf_crawler")
 logging.basicConfig(
@@ -12,7 +12,8 @@ logging.basicConfig(
 )
 
 class HuggingFaceScraper:
-    def __init__(self):
+    def __init__(self, transport: HttpTransport = None):
+        self.transport = transport or default_transport
         self.base_url = "https://huggingface.co/papers/"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
@@ -20,7 +21,7 @@ class HuggingFaceScraper:
 
     def get_paper_details(self, paper_id: str) -> Optional[Dict]:
         url = f"{self.base_url}{paper_id}"
-        response = requests.get(url, headers=self.headers, timeout=30)
+        response = self.transport.get(url, headers=self.headers)
         
         if response.status_code != 200:
             logger.error(f"Failed to fetch paper {paper_id}. Status code: {response.status_code}")
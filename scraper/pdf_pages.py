@@ -0,0 +1,176 @@
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+
+from .transport import HttpTransport, default_transport
+
+logger = logging.getLogger("pdf_pages")
+
+BLOCK_SIZE = 64 * 1024
+# Past this many bytes a ranged probe is no cheaper than downloading the file
+MAX_PROBE_BYTES = 1024 * 1024
+
+
+class RangeNotSupported(Exception):
+    """The server ignored the Range header; carries the full response body it sent instead."""
+
+    def __init__(self, content: bytes):
+        super().__init__("server does not support range requests")
+        self.content = content
+
+
+class ProbeBudgetExceeded(Exception):
+    pass
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Seekable read-only file over HTTP: reads are served from BLOCK_SIZE blocks that
+    are fetched with Range requests on first use. Lets PdfReader parse only the
+    parts of a PDF it actually touches (trailer, xref, catalog, page tree root).
+    """
+
+    def __init__(self, url: str, transport: HttpTransport = None, headers: Dict = None,
+                 block_size: int = BLOCK_SIZE, max_bytes: int = MAX_PROBE_BYTES):
+        self.url = url
+        self.transport = transport or default_transport
+        self.headers = headers or {}
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self.bytes_fetched = 0
+        self.requests = 0
+        self.pos = 0
+        self.blocks = {}
+        # The tail holds startxref and usually the xref stream / trailer; it also tells the file size
+        self.size = None
+        self.tail_start, self.tail = self._fetch(f"bytes=-{block_size}")
+        if self.size is None:
+            self.size = self.tail_start + len(self.tail)
+
+    def _fetch(self, byte_range: str) -> Tuple[int, bytes]:
+        if self.bytes_fetched >= self.max_bytes:
+            raise ProbeBudgetExceeded(f"{self.url}: read {self.bytes_fetched} bytes without finding the page count")
+        response = self.transport.get(self.url, headers={**self.headers, 'Range': byte_range})
+        self.requests += 1
+        self.bytes_fetched += len(response.content)
+        if response.status_code == 200:
+            raise RangeNotSupported(response.content)
+        if response.status_code != 206:
+            raise IOError(f"{self.url}: range request failed with status {response.status_code}")
+        match = re.match(r'bytes (\d+)-(\d+)/(\d+|\*)', response.headers.get('Content-Range', ''))
+        if not match:
+            raise IOError(f"{self.url}: missing Content-Range in 206 response")
+        if match.group(3) != '*':
+            self.size = int(match.group(3))
+        return int(match.group(1)), response.content
+
+    def _read_at(self, pos: int, n: int) -> bytes:
+        if pos >= self.tail_start:
+            return self.tail[pos - self.tail_start:pos - self.tail_start + n]
+        index, offset = divmod(pos, self.block_size)
+        if index not in self.blocks:
+            start = index * self.block_size
+            self.blocks[index] = self._fetch(f"bytes={start}-{start + self.block_size - 1}")[1]
+        # Stop at the tail so reads spanning both continue from it
+        return self.blocks[index][offset:min(offset + n, self.tail_start - index * self.block_size)]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.pos = offset
+        elif whence == io.SEEK_CUR:
+            self.pos += offset
+        else:
+            self.pos = self.size + offset
+        self.pos = max(0, self.pos)
+        return self.pos
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            n = self.size - self.pos
+        chunks = []
+        while n > 0 and self.pos < self.size:
+            chunk = self._read_at(self.pos, n)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            self.pos += len(chunk)
+            n -= len(chunk)
+        return b''.join(chunks)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _count_pages(stream) -> int:
+    reader = PdfReader(stream, strict=False)
+    try:
+        # /Count of the page tree root: no need to walk every page object
+        return int(reader.trailer['/Root']['/Pages']['/Count'])
+    except (KeyError, TypeError, ValueError):
+        return len(reader.pages)
+
+
+def probe_num_pages(url: str, transport: HttpTransport = None, headers: Dict = None) -> Dict:
+    """
+    Page count of a remote PDF using range requests, with a streamed full download
+    as fallback (no range support, damaged xref, or the probe growing too large).
+
+    Returns:
+        dict: num_pages (None on failure), bytes (downloaded), requests, method ('range' / 'full').
+    """
+    transport = transport or default_transport
+    reader = None
+    try:
+        reader = RangeReader(url, transport, headers)
+        return {'num_pages': _count_pages(reader), 'bytes': reader.bytes_fetched,
+                'requests': reader.requests, 'method': 'range'}
+    except RangeNotSupported as e:
+        # The server already sent the whole file
+        return {'num_pages': _count_pages_safe(e.content), 'bytes': len(e.content), 'requests': 1, 'method': 'full'}
+    except Exception as e:
+        logger.debug(f"Range probe failed for {url}: {e}; falling back to a full download")
+
+    spent_bytes = reader.bytes_fetched if reader else 0
+    spent_requests = reader.requests if reader else 0
+    try:
+        response = transport.get(url, headers=headers, stream=True)
+        response.raise_for_status()
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(BLOCK_SIZE):
+            buffer.write(chunk)
+        content = buffer.getvalue()
+    except Exception as e:
+        logger.error(f"Failed to download {url}: {e}")
+        return {'num_pages': None, 'bytes': spent_bytes, 'requests': spent_requests + 1, 'method': 'full'}
+    return {'num_pages': _count_pages_safe(content), 'bytes': spent_bytes + len(content),
+            'requests': spent_requests + 1, 'method': 'full'}
+
+
+def _count_pages_safe(content: bytes) -> Optional[int]:
+    try:
+        with io.BytesIO(content) as pdf_file:
+            return _count_pages(pdf_file)
+    except Exception:
+        return None
+
+
+def probe_num_pages_many(urls: List[str], transport: HttpTransport = None, max_workers: int = 8) -> Dict[str, Dict]:
+    """Probe many PDFs concurrently; the transport's per-host rate limit still applies."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda url: probe_num_pages(url, transport), urls)
+        return dict(zip(urls, results))
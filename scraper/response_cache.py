@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+DAY = 24 * 3600
+
+# Freshness per source, longest "host/path-prefix" match wins
+DEFAULT_TTLS = {
+    'arxiv.org': 7 * DAY,
+    'arxiv.org/pdf': 365 * DAY,   # PDFs do not change for a given version
+    'export.arxiv.org': 1 * DAY,
+    'huggingface.co': 1 * DAY,    # upvotes and citing counts move quickly
+    'portal.core.edu.au': 30 * DAY,
+}
+DEFAULT_TTL = 1 * DAY
+
+# Request headers that change the response and so belong in the key
+KEY_HEADERS = ('Accept', 'Accept-Language', 'Range')
+CACHEABLE_STATUS = {200, 206}
+
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """Raised in offline mode when a request has no cached response."""
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache in one SQLite file.
+
+    Responses are keyed by method + URL + the KEY_HEADERS; bodies are stored once
+    per content hash (zlib-compressed), so identical pages fetched under different
+    URLs share storage. Entries older than their source's TTL are revalidated with
+    If-None-Match / If-Modified-Since, and the least recently used entries are
+    evicted once the bodies exceed max_bytes. With offline=True nothing goes to the
+    network: hits are replayed regardless of age and misses raise OfflineCacheMiss.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 2 * 1024 ** 3, ttls: Dict = None,
+                 offline: bool = False):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS bodies (
+                digest TEXT PRIMARY KEY,
+                data   BLOB NOT NULL,
+                size   INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS responses (
+                key         TEXT PRIMARY KEY,
+                url         TEXT NOT NULL,
+                status      INTEGER NOT NULL,
+                headers     TEXT NOT NULL,
+                digest      TEXT NOT NULL REFERENCES bodies(digest),
+                fetched_at  REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at);
+            CREATE INDEX IF NOT EXISTS responses_digest ON responses(digest);
+        ''')
+        self.conn.commit()
+        # Running total of the stored bodies, so store() only scans when eviction is due
+        self._size = self._stored_bytes()
+
+    @staticmethod
+    def key(method: str, url: str, headers: Dict = None) -> str:
+        headers = CaseInsensitiveDict(headers or {})
+        parts = [method.upper(), url] + [f"{name}:{headers.get(name, '')}" for name in KEY_HEADERS]
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def ttl(self, url: str) -> float:
+        parts = urlsplit(url)
+        target = f"{parts.hostname}{parts.path}"
+        matches = [prefix for prefix in self.ttls if target.startswith(prefix)]
+        return self.ttls[max(matches, key=len)] if matches else DEFAULT_TTL
+
+    def lookup(self, key: str):
+        """Return (response, is_fresh), or (None, False) if the key is not cached."""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT r.url, r.status, r.headers, r.fetched_at, b.data FROM responses r '
+                'JOIN bodies b ON b.digest = r.digest WHERE r.key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, False
+            url, status, headers, fetched_at, data = row
+            fresh = self.offline or time.time() - fetched_at < self.ttl(url)
+            if fresh:
+                self.hits += 1
+            with self.conn:
+                self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        return self._to_response(url, status, json.loads(headers), zlib.decompress(data)), fresh
+
+    def validators(self, response: requests.Response) -> Dict:
+        """Conditional request headers for revalidating a stale cached response."""
+        headers = {}
+        if response.headers.get('ETag'):
+            headers['If-None-Match'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = response.headers['Last-Modified']
+        return headers
+
+    def refresh(self, key: str) -> None:
+        """The server answered 304: the cached response is fresh again."""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute('UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?', (now, now, key))
+            self.revalidated += 1
+
+    def store(self, key: str, response: requests.Response) -> None:
+        if response.status_code not in CACHEABLE_STATUS:
+            return
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        data = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            try:
+                with self.conn:
+                    old = self.conn.execute('SELECT digest FROM responses WHERE key = ?', (key,)).fetchone()
+                    if self.conn.execute('INSERT OR IGNORE INTO bodies (digest, data, size) VALUES (?, ?, ?)',
+                                         (digest, data, len(data))).rowcount:
+                        self._size += len(data)
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO responses (key, url, status, headers, digest, fetched_at, accessed_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (key, response.url, response.status_code, json.dumps(dict(response.headers)), digest, now, now),
+                    )
+                    # A replaced response may have been the last one using its old body
+                    if old is not None and old[0] != digest:
+                        self._drop_unused_body(old[0])
+                    if self._size > self.max_bytes:
+                        self._evict()
+            except sqlite3.Error:
+                # Rolled back: the running total no longer matches the table
+                self._size = self._stored_bytes()
+                raise
+
+    def _stored_bytes(self) -> int:
+        return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+
+    def _drop_unused_body(self, digest: str) -> None:
+        if self.conn.execute('SELECT 1 FROM responses WHERE digest = ? LIMIT 1', (digest,)).fetchone() is None:
+            row = self.conn.execute('SELECT size FROM bodies WHERE digest = ?', (digest,)).fetchone()
+            if row is not None:
+                self.conn.execute('DELETE FROM bodies WHERE digest = ?', (digest,))
+                self._size -= row[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used responses until the stored bodies fit in max_bytes."""
+        rows = self.conn.execute('SELECT key, digest FROM responses ORDER BY accessed_at').fetchall()
+        for key, digest in rows:
+            if self._size <= self.max_bytes:
+                break
+            self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._drop_unused_body(digest)
+
+    @staticmethod
+    def _to_response(url: str, status: int, headers: Dict, body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.url = url
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        # The stored body is already decoded, drop the transfer headers that described the wire format
+        response.headers.pop('Content-Encoding', None)
+        response.headers.pop('Transfer-Encoding', None)
+        response.headers['X-Cache'] = 'HIT'
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        return response
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()
+            bodies, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM bodies').fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'bodies': bodies,
+                'size_mb': round(size / 1024 ** 2, 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'offline': self.offline,
+            }
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+if __name__ == '__main__':
+    # Usage: python -m scraper.response_cache [data/http_cache.db]
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'data/http_cache.db'
+    if not os.path.exists(db_path):
+        print(f"No response cache at {db_path}")
+        sys.exit(1)
+    cache = ResponseCache(db_path)
+    print(cache.stats())
+    cache.close()
@@ -1,22 +1,72 @@
-from semanticscholar import SemanticScholar
+import logging
+import os
+from typing import Dict, List, Optional
+
+from .transport import HttpTransport, default_transport
+
+logger = logging.getLogger("ss_api")
+
+GRAPH_API_URL = "https://api.semanticscholar.org/graph/v1"
+# POST /paper/batch accepts at most 500 ids per call
+BATCH_SIZE = 500
+# Largest page the citations / references endpoints return
+PAGE_SIZE = 1000
+PAPER_FIELDS = ["paperId", "externalIds", "publicationVenue",
+                "citationCount", "referenceCount", "influentialCitationCount"]
+LINK_FIELDS = ["externalIds", "citationCount", "referenceCount", "influentialCitationCount"]
+
 
 class SemanticScholarAPI():
-    def __init__(self):
-        self.scraper = SemanticScholar()
+    def __init__(self, transport: HttpTransport = None, api_key: str = None):
+        """
+        Args:
+            transport (HttpTransport): Shared rate-limited transport (api.semanticscholar.org is throttled there).
+            api_key (str): Optional Graph API key, defaults to the S2_API_KEY environment variable.
+        """
+        self.transport = transport or default_transport
+        api_key = api_key or os.environ.get('S2_API_KEY')
+        self.headers = {'x-api-key': api_key} if api_key else {}
 
-    def get_paper_details(self, arxiv_id: str):
-        try:
-            api_res = self.scraper.get_paper(
-            f'arXiv:{arxiv_id}',
-            fields=["externalIds", "publicationVenue",
-                    "citationCount","referenceCount","influentialCitationCount",
-                    "citations.citationCount", "citations.referenceCount",
-                    "references.citationCount", "references.referenceCount"]
+    def lookup_papers(self, arxiv_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Paper-level fields for many arXiv ids through POST /paper/batch, BATCH_SIZE ids per call.
+        Ids Semantic Scholar does not know map to None.
+        """
+        records = {}
+        for start in range(0, len(arxiv_ids), BATCH_SIZE):
+            chunk = arxiv_ids[start:start + BATCH_SIZE]
+            response = self.transport.post(
+                f"{GRAPH_API_URL}/paper/batch",
+                params={'fields': ','.join(PAPER_FIELDS)},
+                json={'ids': [f'arXiv:{arxiv_id}' for arxiv_id in chunk]},
+                headers=self.headers,
             )
-        except Exception as e:
-            return None
-        api_res = dict(api_res)
-        # return api_res
+            response.raise_for_status()
+            # One entry per requested id, in order, null when not found
+            records.update(zip(chunk, response.json()))
+        return records
+
+    def _get_links(self, paper_id: str, kind: str) -> List[Dict]:
+        """Every entry of /paper/{id}/citations or /references, page by page."""
+        key = 'citingPaper' if kind == 'citations' else 'citedPaper'
+        links, offset = [], 0
+        while offset is not None:
+            response = self.transport.get(
+                f"{GRAPH_API_URL}/paper/{paper_id}/{kind}",
+                params={'fields': ','.join(LINK_FIELDS), 'offset': offset, 'limit': PAGE_SIZE},
+                headers=self.headers,
+            )
+            response.raise_for_status()
+            page = response.json()
+            links.extend(entry.get(key) or {} for entry in page.get('data') or [])
+            offset = page.get('next')
+        return links
+
+    def complete(self, api_res: Dict, with_links: bool = True) -> Dict:
+        """
+        Turn a /paper/batch record into the per-paper schema. Citation / reference
+        lists are only requested when asked for and when the paper has any.
+        """
         def extract_citation_info(entry):
             ext_ids = entry.get('externalIds') or {}
             return {
@@ -26,10 +76,11 @@ class SemanticScholarAPI():
                 'influentialCitationCount': entry.get('influentialCitationCount')
             }
 
-        # Local references for faster attribute access
-        citations = api_res.get('citations', [])
-        references = api_res.get('references', [])
-        # authors = api_res.get('authors', [])
+        citations, references = [], []
+        if with_links and api_res.get('citationCount'):
+            citations = self._get_links(api_res['paperId'], 'citations')
+        if with_links and api_res.get('referenceCount'):
+            references = self._get_links(api_res['paperId'], 'references')
         venue = api_res.get('publicationVenue', {}) or {}
 
         return {
@@ -39,15 +90,31 @@ class SemanticScholarAPI():
             },
             'citationCount': api_res.get('citationCount'),
             'citations': [extract_citation_info(c) for c in citations],
-            # 'citations': api_res.get('citations'),
             'referenceCount': api_res.get('referenceCount'),
             'references': [extract_citation_info(r) for r in references],
-            # 'references': api_res.get('references'),
             'influentialCitationCount': api_res.get('influentialCitationCount'),
             'embedding': api_res.get('embedding'),
-            # 'authors': authors
         }
 
+    def get_papers_batch(self, arxiv_ids: List[str], with_links: bool = True) -> Dict[str, Optional[Dict]]:
+        """
+        Per-paper details for many arXiv ids: one /paper/batch call per BATCH_SIZE ids,
+        plus paginated citation / reference lists for the papers that have any.
+
+        Returns:
+            dict: arxiv_id -> same schema as get_paper_details, or None if not found.
+        """
+        records = self.lookup_papers(list(arxiv_ids))
+        return {arxiv_id: self.complete(record, with_links) if record else None
+                for arxiv_id, record in records.items()}
+
+    def get_paper_details(self, arxiv_id: str):
+        try:
+            return self.get_papers_batch([arxiv_id]).get(arxiv_id)
+        except Exception as e:
+            logger.error(f"Failed to fetch paper {arxiv_id}: {str(e)}")
+            return None
+
 if __name__ == '__main__':
     ss_scraper = SemanticScholarAPI()
 
@@ -55,4 +122,4 @@ if __name__ == '__main__':
     # print(paper)
     import json
     with open('test.json', 'w', encoding='utf-8') as file:
-        json.dump(paper, file, ensure_ascii=False, indent=4, default=str)
\ No newline at end of file
+        json.dump(paper, file, ensure_ascii=False, indent=4, default=str)
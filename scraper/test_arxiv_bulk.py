@@ -0,0 +1,123 @@
+"""
+The export API (Atom) and OAI-PMH (arXivRaw) parsers against the recorded
+responses in scraper/fixtures, and resumption-token paging in harvest().
+
+    python -m pytest scraper/test_arxiv_bulk.py
+"""
+import io
+import os
+from datetime import datetime
+
+from scraper.arxiv_bulk import ArxivBulkClient, OAI_URL, parse_atom, parse_oai
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+ATOM = os.path.join(FIXTURES, 'arxiv_atom.xml')
+OAI = os.path.join(FIXTURES, 'arxiv_oai_raw.xml')
+TOKEN = '6960524|1001'
+
+
+def read_oai(source):
+    """All papers of a ListRecords page and the token parse_oai returns."""
+    records = parse_oai(source)
+    papers = []
+    while True:
+        try:
+            papers.append(next(records))
+        except StopIteration as stop:
+            return papers, stop.value
+
+
+def test_parse_atom():
+    papers = list(parse_atom(ATOM))
+    # The error entry for the malformed id is skipped
+    assert [p['arxiv_id'] for p in papers] == ['1706.03762', '2002.09132']
+
+    attention, sample = papers
+    assert attention['published_date'] == datetime(2017, 6, 12)
+    assert attention['last_revised_date'] == datetime(2023, 8, 2)
+    assert attention['num_revisions'] == 6
+    assert attention['primary_category'] == 'cs.CL'
+    assert attention['categories'] == ['cs.CL', 'cs.LG']
+    assert attention['authors'] == ['Ashish Vaswani', 'Noam Shazeer', 'Niki Parmar']
+    assert attention['pdf_url'] == 'https://arxiv.org/pdf/1706.03762.pdf'
+
+    assert sample['published_date'] == sample['last_revised_date'] == datetime(2020, 2, 21)
+    assert sample['num_revisions'] == 0
+    assert sample['categories'] == ['cs.LG', 'stat.ML']
+
+
+def test_parse_oai():
+    papers, token = read_oai(OAI)
+    # The deleted record in between is skipped
+    assert [p['arxiv_id'] for p in papers] == ['1701.00001', '1701.00003']
+    assert token == TOKEN
+
+    first, second = papers
+    assert first['published_date'] == datetime(2016, 12, 31)
+    assert first['last_revised_date'] == datetime(2017, 1, 5)
+    assert first['num_revisions'] == 1
+    assert first['primary_category'] == 'cs.LG'
+    assert first['categories'] == ['cs.LG', 'cs.IR', 'stat.ML']
+    assert first['authors'] == ['Jane Doe', 'John Smith', 'Alice Nguyen']
+
+    assert second['published_date'] == datetime(2017, 1, 2)
+    assert second['categories'] == ['cs.AI']
+
+
+def last_page() -> bytes:
+    """The fixture as the final page of a list: an empty resumptionToken."""
+    with open(OAI, 'rb') as f:
+        page = f.read()
+    return page.replace(f'>{TOKEN}</resumptionToken>'.encode(), b'></resumptionToken>')
+
+
+def test_parse_oai_last_page():
+    _, token = read_oai(io.BytesIO(last_page()))
+    assert token is None
+
+
+class _Response:
+    def __init__(self, body: bytes):
+        self.raw = io.BytesIO(body)
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class RecordedTransport:
+    """Serves the fixture for the first request and its last-page variant after that."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, params=None, stream=False):
+        self.requests.append((url, dict(params)))
+        if len(self.requests) == 1:
+            with open(OAI, 'rb') as f:
+                return _Response(f.read())
+        return _Response(last_page())
+
+
+def test_harvest_follows_resumption_token():
+    transport = RecordedTransport()
+    client = ArxivBulkClient(transport)
+    papers = list(client.harvest('cs', from_date='2017-01-01', categories=['cs.LG', 'cs.AI']))
+
+    assert [p['arxiv_id'] for p in papers] == ['1701.00001', '1701.00003'] * 2
+    assert len(transport.requests) == 2
+    (first_url, first), (second_url, second) = transport.requests
+    assert first_url == second_url == OAI_URL
+    assert first == {'verb': 'ListRecords', 'metadataPrefix': 'arXivRaw', 'set': 'cs', 'from': '2017-01-01'}
+    # Later pages carry only the token, as OAI-PMH requires
+    assert second == {'verb': 'ListRecords', 'resumptionToken': TOKEN}
+
+
+def test_harvest_filters():
+    papers = list(ArxivBulkClient(RecordedTransport()).harvest('cs', categories=['cs.AI'], year=2017))
+    assert [p['arxiv_id'] for p in papers] == ['1701.00003', '1701.00003']
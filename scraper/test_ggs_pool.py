@@ -0,0 +1,78 @@
+"""
+BrowserPool against the local Google Scholar stand-in (ggs_standin.py).
+
+Chrome is not needed: sessions are a small HTTP scraper that reads the stand-in's
+search page. A "dead" session mimics GoogleScholarScraper after its driver broke:
+search_paper swallows the error and get_paper_details returns None.
+
+    python -m pytest scraper/test_ggs_pool.py
+"""
+import itertools
+
+import pytest
+import requests
+from bs4 import BeautifulSoup
+
+from scraper.ggs_pool import BrowserPool
+from scraper.ggs_standin import StandinScholar
+
+
+class StandinScraper:
+    def __init__(self, base_url, dead=False, **kwargs):
+        self.base_url = base_url
+        self.dead = dead
+        self.have_cookies = False
+        self.captcha_events = 0
+        self.closed = False
+        self.session = requests.Session()
+
+    def get_paper_details(self, arxiv_id, include_citations_over_time=True):
+        if self.dead:
+            return None
+        response = self.session.get(f'{self.base_url}/scholar', params={'q': f'arxiv:{arxiv_id}'}, timeout=5)
+        soup = BeautifulSoup(response.text, 'html.parser')
+        authors = [{'name': a.get_text(strip=True), 'url': a['href']} for a in soup.select('div.gs_fmaa a')]
+        return {'arxiv_id': arxiv_id, 'authors': authors}
+
+    def close(self):
+        self.closed = True
+        self.session.close()
+
+
+@pytest.fixture
+def standin():
+    server = StandinScholar()
+    base_url = server.start()
+    yield base_url
+    server.stop()
+
+
+def test_empty_result_recycles_session(standin, tmp_path):
+    started = []
+    # The first session's driver is broken; every later one is healthy
+    numbers = itertools.count()
+
+    def factory(**kwargs):
+        scraper = StandinScraper(dead=next(numbers) == 0, **kwargs)
+        started.append(scraper)
+        return scraper
+
+    pool = BrowserPool(size=1, max_uses=50, base_url=standin, profile_root=str(tmp_path),
+                       seed_cookies=None, interactive=False, factory=factory)
+    try:
+        assert pool.get_paper_details('1706.03762') is None
+        # The broken session was quit instead of going back to the pool
+        assert started[0].closed
+        assert pool.metrics()['recycled'] == {'failure': 1}
+
+        details = pool.get_paper_details('1706.03762')
+        assert details is not None and details['authors']
+        assert len(started) == 2 and not started[1].closed
+
+        # The healthy replacement is reused for the next paper
+        assert pool.get_paper_details('1810.04805') is not None
+        metrics = pool.metrics()
+        assert metrics['sessions_started'] == 2
+        assert metrics['failures'] == 1
+    finally:
+        pool.close()
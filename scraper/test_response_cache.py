@@ -0,0 +1,79 @@
+"""
+ResponseCache's running size total against the bodies table, through shared
+bodies, replaced responses and LRU eviction, and HttpTransport in offline mode.
+
+    python -m pytest scraper/test_response_cache.py
+"""
+import os
+
+import pytest
+import requests
+
+from scraper.response_cache import OfflineCacheMiss, ResponseCache
+from scraper.transport import HttpTransport
+
+
+def make_response(url: str, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.url = url
+    response.status_code = 200
+    response._content = body
+    return response
+
+
+def stored_bytes(cache: ResponseCache) -> int:
+    return cache.conn.execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+
+
+def test_running_total_matches_bodies(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    bodies = [os.urandom(1000) for _ in range(4)]
+    cache = ResponseCache(db_path, max_bytes=2500)
+
+    cache.store('a', make_response('https://arxiv.org/abs/a', bodies[0]))
+    # Same body under another URL is stored once
+    cache.store('b', make_response('https://arxiv.org/abs/b', bodies[0]))
+    assert cache.stats()['bodies'] == 1
+    assert cache._size == stored_bytes(cache)
+
+    # Replacing both responses leaves the first body unused
+    cache.store('a', make_response('https://arxiv.org/abs/a', bodies[1]))
+    cache.store('b', make_response('https://arxiv.org/abs/b', bodies[2]))
+    assert cache.stats()['bodies'] == 2
+    assert cache._size == stored_bytes(cache)
+
+    # A third ~1000 byte body goes over max_bytes: the least recently used one goes
+    cache.lookup('a')
+    cache.store('c', make_response('https://arxiv.org/abs/c', bodies[3]))
+    keys = {key for key, in cache.conn.execute('SELECT key FROM responses')}
+    assert keys == {'a', 'c'}
+    assert cache._size == stored_bytes(cache) <= cache.max_bytes
+    cache.close()
+
+    # The total is picked up again on reopen
+    cache = ResponseCache(db_path, max_bytes=2500)
+    assert cache._size == stored_bytes(cache)
+    cache.close()
+
+
+class NoNetwork(requests.Session):
+    def request(self, *args, **kwargs):
+        raise AssertionError(f"offline request reached the network: {args}")
+
+
+def test_offline_uncached_requests_raise(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), offline=True)
+    transport = HttpTransport(cache=cache)
+    for host in ('api.semanticscholar.org', 'arxiv.org', 'export.arxiv.org', 'scholar.google.com'):
+        transport._host_state(host)
+        transport._sessions[host] = NoNetwork()
+
+    with pytest.raises(OfflineCacheMiss):
+        transport.post('https://api.semanticscholar.org/graph/v1/paper/batch', json={'ids': ['arXiv:1706.03762']})
+    with pytest.raises(OfflineCacheMiss):
+        transport.get('https://arxiv.org/pdf/1706.03762.pdf', stream=True)
+    with pytest.raises(OfflineCacheMiss):
+        transport.get('https://export.arxiv.org/api/query', params={'id_list': '1706.03762'}, stream=True)
+    with pytest.raises(OfflineCacheMiss):
+        transport.get('https://scholar.google.com/citations?user=x', use_cache=False)
+    cache.close()
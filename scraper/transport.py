@@ -0,0 +1,247 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .response_cache import ResponseCache, OfflineCacheMiss
+
+logger = logging.getLogger("transport")
+logging.basicConfig(
+    filename='arxiv.log',
+    encoding='utf-8',
+    level=logging.DEBUG,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# Politeness limits per host: (requests per second, burst size)
+DEFAULT_RATE_LIMITS = {
+    'arxiv.org': (4.0, 4),
+    'export.arxiv.org': (0.33, 1),  # arXiv API terms: one request every 3 seconds
+    'huggingface.co': (5.0, 5),
+    'api.semanticscholar.org': (1.0, 1),
+    'portal.core.edu.au': (5.0, 5),
+    'scholar.google.com': (1.0, 2),
+}
+DEFAULT_RATE = (5.0, 5)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `capacity` saved up."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the time waited in seconds."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for `seconds` (used for Retry-After)."""
+        with self.lock:
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttle_wait = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'throttle_wait_s': round(self.throttle_wait, 3),
+            'mean_latency_s': round(self.total_latency / self.requests, 4) if self.requests else None,
+            'max_latency_s': round(self.max_latency, 4),
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HttpTransport:
+    """
+    Shared HTTP layer for the requests-based scrapers:
+    one pooled keep-alive session per host, a token-bucket rate limiter per host,
+    exponential backoff with Retry-After support, and per-host latency / error counters.
+    GET requests go through `cache` (a ResponseCache) when one is set.
+    """
+
+    def __init__(self, rate_limits: Dict = None, max_retries: int = 3, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, timeout: float = 30, pool_size: int = 10,
+                 cache: Optional[ResponseCache] = None):
+        self.cache = cache
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._sessions: Dict[str, requests.Session] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, host: str):
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update(DEFAULT_HEADERS)
+                rate, capacity = self.rate_limits.get(host, DEFAULT_RATE)
+                self._sessions[host] = session
+                self._buckets[host] = TokenBucket(rate, capacity)
+                self._stats[host] = HostStats()
+            return self._sessions[host], self._buckets[host], self._stats[host]
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)  # jitter
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Serve cacheable GETs from the response cache: fresh entries are returned as-is,
+        stale ones are revalidated with a conditional request. Everything else, and
+        requests made with use_cache=False, is sent as-is; in offline mode it raises
+        OfflineCacheMiss instead.
+        """
+        use_cache = kwargs.pop('use_cache', True)
+        if self.cache is None or not use_cache or method.upper() != 'GET' or kwargs.get('stream'):
+            if self.cache is not None and self.cache.offline:
+                raise OfflineCacheMiss(f"{method.upper()} {url} is not served from the response cache (offline mode)")
+            return self._send(method, url, **kwargs)
+
+        # Key on the final URL so query params are part of it
+        full_url = requests.Request(method, url, params=kwargs.pop('params', None)).prepare().url
+        headers = dict(kwargs.pop('headers', None) or {})
+        key = self.cache.key(method, full_url, headers)
+
+        cached, fresh = self.cache.lookup(key)
+        if fresh:
+            return cached
+        if self.cache.offline:
+            raise OfflineCacheMiss(f"{full_url} is not in the response cache (offline mode)")
+        if cached is not None:
+            headers.update(self.cache.validators(cached))
+
+        response = self._send(method, full_url, headers=headers, **kwargs)
+        if cached is not None and response.status_code == 304:
+            self.cache.refresh(key)
+            return cached
+        self.cache.store(key, response)
+        return response
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the host's session. Connection errors, timeouts, 429 and
+        5xx responses are retried; the last response is returned as-is so callers can
+        keep checking status_code. Raises the last exception if every attempt failed
+        to get a response.
+        """
+        host = urlsplit(url).hostname or ''
+        session, bucket, stats = self._host_state(host)
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            waited = bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+            latency = time.perf_counter() - start
+
+            with self._lock:
+                stats.requests += 1
+                stats.throttle_wait += waited
+                stats.total_latency += latency
+                stats.max_latency = max(stats.max_latency, latency)
+                if error is not None or response.status_code >= 400:
+                    stats.errors += 1
+
+            retryable = error is not None or response.status_code in RETRY_STATUS
+            if not retryable or attempt == self.max_retries:
+                break
+
+            delay = self._backoff(attempt)
+            if response is not None:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None:
+                    delay = min(self.backoff_max, retry_after)
+                    bucket.pause(delay)
+            logger.warning(f"{method} {url} failed ({error or response.status_code}), "
+                           f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            with self._lock:
+                stats.retries += 1
+            time.sleep(delay)
+
+        if error is not None:
+            raise error
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            stats = {host: s.as_dict() for host, s in self._stats.items()}
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        return stats
+
+
+# Shared by all scrapers unless one is given its own
+default_transport = HttpTransport()
@@ -1,15 +1,16 @@
-import re, math, time, requests
+import re, math
 from bs4 import BeautifulSoup
+from .transport import default_transport
 
-def crawl_core_min(source="CORE2023", search="", timeout=20, delay=0.2):
+def crawl_core_min(source="CORE2023", search="", timeout=20, transport=None):
     # search = "" -> get all
     base = "https://portal.core.edu.au/conf-ranks/"
-    sess = requests.Session()
-    sess.headers.update({"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"})
+    # Pacing between pages comes from the transport's per-host rate limit
+    transport = transport or default_transport
     items, page, total_pages = [], 1, None
     while True:
         params = {"by":"all","source":source,"sort":"arank","search":search,"page":page}
-        r = sess.get(base, params=params, timeout=timeout); r.raise_for_status()
+        r = transport.get(base, params=params, timeout=timeout); r.raise_for_status()
         soup = BeautifulSoup(r.text, "html.parser")
         if total_pages is None:
             info = soup.find(string=re.compile(r"Showing\s+results", re.I))
@@ -32,7 +33,7 @@ def crawl_core_min(source="CORE2023", search="", timeout=20, delay=0.2):
         if page_rows == 0: break
         page += 1
         if total_pages and page > total_pages: break
-        time.sleep(delay)
     return items
 
-print(crawl_core_min())
\ No newline at end of file
+if __name__ == '__main__':
+    print(crawl_core_min())
\ No newline at end of file
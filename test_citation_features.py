@@ -0,0 +1,22 @@
+"""
+The matrix citation features (citation_features.py) against the row-by-row
+implementation data_preprocessing.pipeline used before, on a small synthetic corpus.
+The 100k-paper timing run stays in benchmark_features.py.
+
+    python -m pytest test_citation_features.py
+"""
+import pytest
+
+from benchmark_features import (check_citation_parity, matrix_citation_features, reference_citation_features,
+                                synthetic_papers)
+
+
+@pytest.fixture(scope='module')
+def papers():
+    return synthetic_papers(300)
+
+
+# An early year leaves most papers unpublished; the late one covers every year
+@pytest.mark.parametrize('year', [2015, 2024])
+def test_matrix_matches_row_wise(papers, year):
+    check_citation_parity(reference_citation_features(papers, year), matrix_citation_features(papers, year))
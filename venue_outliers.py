@@ -0,0 +1,92 @@
+"""
+Venue ranking reassignment for citation outliers among "Other" venues.
+
+An "Other" paper whose citationCount is outside the IQR fences of the "Other"
+group is given the ranking whose median citationCount is nearest. The medians and
+fences are fitted once and saved as JSON, so the same mapping can be applied to new
+papers (e.g. in the backend) without the dataset they were computed on.
+"""
+import json
+import os
+
+import numpy as np
+
+OTHER = 'Other'
+
+
+class VenueOutlierMapper:
+    def __init__(self, labels=(), medians=(), lower_bound: float = np.nan, upper_bound: float = np.nan):
+        """
+        Args:
+            labels: Rankings with a median, in tie-breaking order (first wins).
+            medians: Median citationCount of each ranking.
+            lower_bound, upper_bound (float): IQR fences of the "Other" group.
+        """
+        self.labels = np.asarray(labels, dtype=object)
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.lower_bound = float(lower_bound)
+        self.upper_bound = float(upper_bound)
+
+    def fit(self, rankings, citation_counts) -> 'VenueOutlierMapper':
+        rankings = np.asarray(rankings, dtype=object)
+        citation_counts = np.asarray(citation_counts, dtype=np.float64)
+
+        # Sorted labels: the key order of groupby('venue_ranking').median().to_dict()
+        ranked = rankings != OTHER
+        self.labels = np.array(sorted(set(rankings[ranked])), dtype=object)
+        self.medians = np.array([np.median(citation_counts[rankings == label]) for label in self.labels])
+
+        other = citation_counts[~ranked]
+        if len(other):
+            q1, q3 = np.percentile(other, 25), np.percentile(other, 75)
+            iqr = q3 - q1
+            self.lower_bound, self.upper_bound = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        else:
+            self.lower_bound = self.upper_bound = np.nan
+        return self
+
+    def nearest(self, citation_counts) -> np.ndarray:
+        """Ranking with the nearest median for each count; ties go to the earliest label, as min() did."""
+        distance = np.abs(self.medians[None, :] - np.asarray(citation_counts, dtype=np.float64)[:, None])
+        return self.labels[np.argmin(distance, axis=1)]
+
+    def outliers(self, rankings, citation_counts) -> np.ndarray:
+        citation_counts = np.asarray(citation_counts, dtype=np.float64)
+        return ((np.asarray(rankings, dtype=object) == OTHER)
+                & ((citation_counts < self.lower_bound) | (citation_counts > self.upper_bound)))
+
+    def transform(self, rankings, citation_counts) -> np.ndarray:
+        """Rankings with every "Other" outlier replaced by its nearest ranking."""
+        result = np.array(rankings, dtype=object)
+        citation_counts = np.asarray(citation_counts, dtype=np.float64)
+        mask = self.outliers(result, citation_counts)
+        if mask.any() and len(self.labels):
+            result[mask] = self.nearest(citation_counts[mask])
+        return result
+
+    def fit_transform(self, rankings, citation_counts) -> np.ndarray:
+        return self.fit(rankings, citation_counts).transform(rankings, citation_counts)
+
+    def to_dict(self) -> dict:
+        return {
+            'medians': [[label, float(median)] for label, median in zip(self.labels, self.medians)],
+            'lower_bound': self.lower_bound,
+            'upper_bound': self.upper_bound,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'VenueOutlierMapper':
+        labels = [label for label, _ in state['medians']]
+        medians = [median for _, median in state['medians']]
+        return cls(labels, medians, state['lower_bound'], state['upper_bound'])
+
+    def save(self, path: str) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'VenueOutlierMapper':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))